@@ -1,6 +1,11 @@
 """Start Alec."""
 
-from .bot import AlecMaisEnBot
+from .importtime import profiler
+
+profiler.install()
+# Before anything else is imported, for a!startup-profile
+
+from .bot import AlecMaisEnBot  # noqa: E402
 
 if __name__ == "__main__":
     AlecMaisEnBot().launch()  # Run if not imported
@@ -21,15 +21,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import datetime
 import sys
-import traceback
-from io import StringIO
-from typing import Callable
+import typing as t
 
 import discord
 from discord.ext import commands
 
+from ..errors import Handler
+
+Message = t.Callable[[commands.Context, t.Any], str]
+
 
 def secondes(num_seconds: int) -> str:
     """Convert a number of seconds in human-readabla format."""
@@ -48,138 +49,38 @@ def secondes(num_seconds: int) -> str:
     return ", ".join(human_readable)
 
 
-async def error_manager(
-    ctx: commands.Context,
-    error: discord.DiscordException,
-) -> None:
-    """Error manager."""
-    if isinstance(error, commands.CheckAnyFailure):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            ("You don't have the rights to send use the command "
-             f"{ctx.invoked_with}"),
-        )
-        return
-    if isinstance(error, (commands.BadArgument, commands.BadUnionArgument)):
-        await ctx.bot.httpcat(ctx, 400, str(error))
-        return
-    if isinstance(error, commands.MaxConcurrencyReached):
-        pers = {
-            commands.BucketType.default: "bot",
-            commands.BucketType.user: "user",
-            commands.BucketType.guild: "guild",
-            commands.BucketType.channel: "channel",
-            commands.BucketType.member: "member",
-            commands.BucketType.category: "category",
-            commands.BucketType.role: "role",
-        }
-        await ctx.bot.httpcat(
-            ctx,
-            429,
-            (f"This command can only be used {error.number} "
-             f"time{'s' if error.number > 1 else ''} per {pers[error.per]} "
-             "concurrently."),
-        )
-        return
-    if isinstance(error, commands.MissingRequiredArgument):
-        await ctx.bot.httpcat(
-            ctx, 400,
-            f"Hmmmm, looks like an argument is missing : {error.param.name}")
-        return
-    if isinstance(error, commands.PrivateMessageOnly):
-        await ctx.bot.httpcat(
-            ctx, 403, "You must be in a private channel to use this command.")
-        return
-    if isinstance(error, commands.NoPrivateMessage):
-        await ctx.bot.httpcat(ctx, 403, "I can't dot this in private.")
-        return
-    if isinstance(error, commands.CommandNotFound):
-        return  # Ignore command not found
-    if isinstance(error, commands.DisabledCommand):
-        await ctx.bot.httpcat(
-            ctx,
-            423,
-            "Sorry but this command is under maintenance",
-        )
-        return
-    if isinstance(error, commands.TooManyArguments):
-        await ctx.bot.httpcat(
-            ctx,
-            400,
-            "You gave me too many arguments for me to process.",
-        )
-        return
-    if isinstance(error, commands.CommandOnCooldown):
-        await ctx.bot.httpcat(
-            ctx,
-            429,
-            ("Calm down, breath and try again in "
-             f"{secondes(round(error.retry_after))}"),
-        )
-        return
-    if isinstance(error, commands.MissingPermissions):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            "\n-".join(["Try again with the following permission(s) :"] +
-                       error.missing_perms),
-        )
-        return
-    if isinstance(error, commands.BotMissingPermissions):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            "\n-".join(["I need these permissions :"] + error.missing_perms),
-        )
-        return
-    if isinstance(error, commands.MissingRole):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            f"Sorry, but you need to be a {error.missing_role}",
-        )
-        return
-    if isinstance(error, commands.BotMissingRole):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            f"Gimme the role {error.missing_role}, ok ?",
-        )
-        return
-    if isinstance(error, commands.NSFWChannelRequired):
-        await ctx.bot.httpcat(
-            ctx,
-            403,
-            "Woooh ! You must be in an NSFW channel to use this.",
-        )
-        return
-    if isinstance(error, commands.UnexpectedQuoteError):
-        await ctx.bot.httpcat(
-            ctx,
-            400,
-            "I didn't expected that quote...",
-        )
-        return
-    if isinstance(error, commands.InvalidEndOfQuotedStringError):
-        await ctx.bot.httpcat(
-            ctx,
-            400,
-            "You must separate the quoted argument from the others with spaces",
-        )
-        return
-    if isinstance(error, commands.ExpectedClosingQuoteError):
-        await ctx.bot.httpcat(ctx, 400, "I expected a closing quote")
-        return
-    if isinstance(error, commands.CheckFailure):
-        await ctx.bot.httpcat(
-            ctx,
-            401,
-            "You don't have the rights to use this command",
-        )
-        return
+CONCURRENCY_SCOPES = {
+    commands.BucketType.default: "bot",
+    commands.BucketType.user: "user",
+    commands.BucketType.guild: "guild",
+    commands.BucketType.channel: "channel",
+    commands.BucketType.member: "member",
+    commands.BucketType.category: "category",
+    commands.BucketType.role: "role",
+}
+
+
+def reply(code: int, message: t.Union[str, Message]) -> Handler:
+    """Answer an error with an http cat, and a message built from it."""
+    if isinstance(message, str):
+
+        async def send(ctx: commands.Context, error: Exception) -> None:
+            await ctx.bot.httpcat(ctx, code, message)
+
+        return send
+
+    async def build(ctx: commands.Context, error: Exception) -> None:
+        await ctx.bot.httpcat(ctx, code, message(ctx, error))
+
+    return build
 
-    # Here are the real errors
+
+async def ignore(ctx: commands.Context, error: Exception) -> None:
+    """Do nothing."""
+
+
+async def report_error(ctx: commands.Context, error: Exception) -> None:
+    """Apologize, and log the error."""
     if isinstance(error, commands.CommandInvokeError):
         await ctx.bot.httpcat(
             ctx,
@@ -201,69 +102,110 @@ async def error_manager(
                 "when he sees it)"),
         )
 
-    if not ctx.bot.log_channel:  # With nowhere to log, raise
-        raise error
-
     if isinstance(error, commands.CommandInvokeError):
         error = error.original
 
-    embed = discord.Embed(colour=0xFF0000)
-    embed.set_author(name=str(ctx.author), icon_url=str(ctx.author.avatar_url))
-    embed.title = f"{ctx.author.id} caused an error in {ctx.command}"
-    embed.description = f"{type(error).__name__} : {error}"
+    ctx.bot.log_shipper.log(
+        f"{ctx.author} ({ctx.author.id}) caused an error in {ctx.command}",
+        error,
+        f" in {ctx.channel.name} ({ctx.channel.id})",
+    )
+    ctx.bot.error_journal.record(
+        "command",
+        (f"{ctx.command} by {ctx.author.id} in {ctx.channel.id} : "
+         f"{ctx.message.content}"),
+        error,
+    )
 
-    embed.description += f"in {ctx.channel.name} ({ctx.channel.id})"
 
-    formatted_traceback = "".join(traceback.format_tb(error.__traceback__))
-    embed.description += f"```\n{formatted_traceback}```"
-    embed.set_footer(
-        text="Alec mais en logger",
-        icon_url=ctx.bot.user.avatar_url_as(static_format="png"),
-    )
-    embed.timestamp = datetime.datetime.utcnow()
-    try:
-        await ctx.bot.log_channel.send(embed=embed)
-    except discord.DiscordException:
-        await ctx.bot.log_channel.send(file=discord.File(StringIO(
-            f"{embed.title}\n\n{embed.description}"),
-            filename="error.md"))
-        # Send errors in files if they are too big
+HANDLERS: t.List[t.Tuple[t.Tuple[t.Type[Exception], ...], Handler]] = [
+    ((commands.CheckAnyFailure, ),
+     reply(401, lambda ctx, error: ("You don't have the rights to send use "
+                                    f"the command {ctx.invoked_with}"))),
+    ((commands.BadArgument, commands.BadUnionArgument),
+     reply(400, lambda ctx, error: str(error))),
+    ((commands.MaxConcurrencyReached, ),
+     reply(429, lambda ctx, error: (
+         f"This command can only be used {error.number} "
+         f"time{'s' if error.number > 1 else ''} per "
+         f"{CONCURRENCY_SCOPES[error.per]} concurrently."))),
+    ((commands.MissingRequiredArgument, ),
+     reply(400, lambda ctx, error: ("Hmmmm, looks like an argument is "
+                                    f"missing : {error.param.name}"))),
+    ((commands.PrivateMessageOnly, ),
+     reply(403, "You must be in a private channel to use this command.")),
+    ((commands.NoPrivateMessage, ),
+     reply(403, "I can't dot this in private.")),
+    ((commands.CommandNotFound, ), ignore),  # Ignore command not found
+    ((commands.DisabledCommand, ),
+     reply(423, "Sorry but this command is under maintenance")),
+    ((commands.TooManyArguments, ),
+     reply(400, "You gave me too many arguments for me to process.")),
+    ((commands.CommandOnCooldown, ),
+     reply(429, lambda ctx, error: ("Calm down, breath and try again in "
+                                    f"{secondes(round(error.retry_after))}"))),
+    ((commands.MissingPermissions, ),
+     reply(401, lambda ctx, error: "\n-".join(
+         ["Try again with the following permission(s) :"] +
+         error.missing_perms))),
+    ((commands.BotMissingPermissions, ),
+     reply(401, lambda ctx, error: "\n-".join(
+         ["I need these permissions :"] + error.missing_perms))),
+    ((commands.MissingRole, ),
+     reply(401, lambda ctx, error: ("Sorry, but you need to be a "
+                                    f"{error.missing_role}"))),
+    ((commands.BotMissingRole, ),
+     reply(401, lambda ctx, error: (f"Gimme the role {error.missing_role}, "
+                                    "ok ?"))),
+    ((commands.NSFWChannelRequired, ),
+     reply(403, "Woooh ! You must be in an NSFW channel to use this.")),
+    ((commands.UnexpectedQuoteError, ),
+     reply(400, "I didn't expected that quote...")),
+    ((commands.InvalidEndOfQuotedStringError, ),
+     reply(400, ("You must separate the quoted argument from the others with "
+                 "spaces"))),
+    ((commands.ExpectedClosingQuoteError, ),
+     reply(400, "I expected a closing quote")),
+    ((commands.CheckFailure, ),
+     reply(401, "You don't have the rights to use this command")),
+    ((Exception, ), report_error),  # Here are the real errors
+]
 
 
-def generator(bot: commands.Bot) -> Callable:
+async def error_manager(
+    ctx: commands.Context,
+    error: discord.DiscordException,
+) -> None:
+    """Error manager."""
+    await ctx.bot.error_handlers.resolve(type(error))(ctx, error)
+    # report_error handles every Exception
+
+
+def generator(bot: commands.Bot) -> t.Callable:
     """Generate an on_error for the bot."""
 
     # This needs to be wrapped in order to access bot and its attributes
     async def predictate(event: str, *args, **kwargs) -> None:
         """Process the on_error event."""
-        error_type, value, raw_traceback = sys.exc_info()
-        if not error_type:
+        error = sys.exc_info()[1]
+        if not error:
             return  # This shouldn't happen : no error
-        if not bot.log_channel:
-            raise  # There is nowhere to log
-        embed = discord.Embed(colour=0xFF0000)
-        embed.title = f"Error in {event} with args {args} {kwargs}"
-        embed.description = f"{error_type.__name__} : {value}"
-        formatted_traceback = "".join(traceback.format_tb(raw_traceback))
-        embed.description += f"```\n{formatted_traceback}```"
-        embed.set_footer(
-            text="Alec mais en logger",
-            icon_url=bot.user.avatar_url_as(static_format="png"),
-        )
-        embed.timestamp = datetime.datetime.utcnow()
-        try:
-            await bot.log_channel.send(embed=embed)
-            return
-        except discord.DiscordException:
-            await bot.log_channel.send(file=discord.File(
-                StringIO(f"{embed.title}\n\n{embed.description}"),
-                filename="error.md",
-            ))
+        bot.log_shipper.log(f"Error in {event} with args {args} {kwargs}",
+                            error)
+        bot.error_journal.record("event", f"{event} {args} {kwargs}", error)
 
     return predictate
 
 
 def setup(bot: commands.Bot) -> None:
     """Add error managing."""
+    for error_types, handler in HANDLERS:
+        bot.error_handlers.register(handler, *error_types)
     bot.add_listener(error_manager, "on_command_error")
     bot.on_error = generator(bot)
+
+
+def teardown(bot: commands.Bot) -> None:
+    """Remove the handlers of this file."""
+    for _, handler in HANDLERS:
+        bot.error_handlers.unregister(handler)
@@ -21,110 +21,335 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import re
+import sys
 import textwrap
 import typing as t
+from collections import Counter, defaultdict
 from inspect import Parameter
 
 import discord
 import discord.utils
-from discord.ext import commands, menus
+from discord.ext import commands
 
+Page = t.Tuple[t.Optional[commands.Cog], t.List[commands.Command]]
 
-class HelpSource(menus.ListPageSource):
-    """The Help menu."""
+SYNTAX = "Help syntax : `<Required argument>`. `[Optional argument]`"
 
-    def __init__(
+WORD = re.compile(r"\w+")
+
+
+def build_signature(command: commands.Command) -> str:
+    """Build the command's signature."""
+    basis = f"{command.qualified_name}"
+    for arg in command.clean_params.values():
+        if arg.kind in {Parameter.VAR_KEYWORD, Parameter.VAR_POSITIONAL}:
+            basis += f" [{arg.name}]"
+        elif (hasattr(getattr(arg.annotation, "type", None), "__args__")
+              and len(arg.annotation.__args__) == 2
+              and isinstance(arg.annotation.__args__[-1], type(None))):
+            basis += f" [{arg.name} = None]"
+        elif isinstance(arg.annotation, commands.converter._Greedy):
+            # This is fine as of discord.py 1.7.1
+            # However, this will soon break due to this commit :
+            # https://github.com/Rapptz/discord.py/commit/bcd3a00eaff85262db6903cf194fea563825ad4b#diff-e30bed16d1d422b6da3c37af2512366fd41bd0f71e3f1165dd93a6742770305dL837
+            # But I don't know how to make the code not break due to this change.
+            # So I'll have to monitor this situation
+            basis += f" [{arg.name} = (...)]"
+        elif arg.default == Parameter.empty:
+            basis += f" <{arg.name}>"
+        else:
+            basis += f" [{arg.name} = {arg.default}]"
+    return basis
+
+
+def trigrams(text: str) -> t.Set[str]:
+    """Get the trigrams of a text, padded so that short words have some."""
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Strings, found back by the trigrams they share with a query."""
+
+    def __init__(self) -> None:
+        self.postings: t.DefaultDict[str, t.Set[str]] = defaultdict(set)
+        self.grams: t.Dict[str, t.Set[str]] = {}
+
+    def add(self, key: str) -> None:
+        """Index a string."""
+        if key in self.grams:
+            return
+        self.grams[key] = trigrams(key)
+        for gram in self.grams[key]:
+            self.postings[gram].add(key)
+
+    def remove(self, key: str) -> None:
+        """Forget a string."""
+        for gram in self.grams.pop(key, ()):
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def similar(
         self,
-        signature: t.Callable[[commands.Command], str],
-        filter_commands: t.Callable[[t.List[commands.Command]], t.Awaitable, ],
-        prefix: str,
-        author: discord.User,
-        cogs: t.Dict[commands.Cog, t.List[commands.Command]],
-    ) -> None:
-        """Create the menu."""
-        self.get_command_signature = signature
-        self.filter_commands = filter_commands
-        self.prefix = prefix
-        self.menu_author = author
-        super().__init__(
-            [(cog, cogs[cog]) for cog in sorted(
-                cogs, key=lambda cog: cog.qualified_name if cog else "ZZ")
-             if cogs[cog]
-             and [command for command in cogs[cog] if not command.hidden]],
-            per_page=1,
-        )
+        query: str,
+        threshold: float,
+    ) -> t.List[t.Tuple[float, str]]:
+        """Get the strings at least that similar to a query, closest first.
+
+        The similarity is the Dice coefficient of their sets of trigrams. A
+        string that similar shares at least `least` trigrams with the query,
+        so the others are skipped before computing it.
+        """
+        grams = trigrams(query)
+        shared: t.Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        least = threshold * len(grams) / (2 - threshold)
+        results = []
+        for key, count in shared.items():
+            if count >= least:
+                score = 2 * count / (len(grams) + len(self.grams[key]))
+                if score >= threshold:
+                    results.append((score, key))
+        results.sort(reverse=True)
+        return results
+
+
+class CommandIndex:
+    """Find commands from a misspelled name, or from words of their help.
+
+    Names and aliases are indexed by trigrams. So are the words of the
+    names and help texts, each one pointing to the commands using it.
+    Commands are added and removed one by one, so only the ones of an
+    extension being loaded or unloaded are indexed again.
+    """
+
+    def __init__(self) -> None:
+        self.commands: t.Dict[commands.Command,
+                              t.Tuple[t.List[str], t.Set[str]]] = {}
+        self.names = TrigramIndex()
+        self.named: t.Dict[str, commands.Command] = {}
+        self.words = TrigramIndex()
+        self.used_by: t.DefaultDict[str, t.Set[commands.Command]] = (
+            defaultdict(set))
+
+    def update(self, command_list: t.Iterable[commands.Command]) -> None:
+        """Index the new commands, and forget the ones which are gone."""
+        current = set(command_list)
+        for command in self.commands.keys() - current:
+            self.remove(command)
+        for command in current - self.commands.keys():
+            self.add(command)
 
-    async def format_page(
+    def add(self, command: commands.Command) -> None:
+        """Index a command."""
+        parent = f"{command.full_parent_name} " if command.parent else ""
+        names = [command.qualified_name] + [
+            f"{parent}{alias}" for alias in command.aliases
+        ]
+        words = set(
+            WORD.findall(f"{' '.join(names)} {command.help or ''}".lower()))
+        self.commands[command] = (names, words)
+        for name in names:
+            self.names.add(name)
+            self.named[name] = command
+        for word in words:
+            self.words.add(word)
+            self.used_by[word].add(command)
+
+    def remove(self, command: commands.Command) -> None:
+        """Forget a command."""
+        names, words = self.commands.pop(command)
+        for name in names:
+            if self.named.get(name) is command:
+                del self.named[name]
+                self.names.remove(name)
+        for word in words:
+            users = self.used_by[word]
+            users.discard(command)
+            if not users:
+                del self.used_by[word]
+                self.words.remove(word)
+
+    def suggest(self, query: str, limit: int = 3) -> t.List[str]:
+        """Get the names closest to a misspelled one, one per command."""
+        suggestions: t.Dict[commands.Command, str] = {}
+        for _, name in self.names.similar(query, 0.4):
+            suggestions.setdefault(self.named[name], name)
+            if len(suggestions) == limit:
+                break
+        return list(suggestions.values())
+
+    def search(
         self,
-        menu: menus.Menu,
-        page: t.Tuple[commands.Cog, t.List[commands.Command]],
-    ) -> discord.Embed:
-        """Format the pages."""
-        cog, command_list = page
-        embed = discord.Embed(
-            title=(
-                "Help for "
-                f"{cog.qualified_name if cog else 'unclassified commands'}"),
-            description=textwrap.dedent(f"""
-                Help syntax : `<Required argument>`. `[Optional argument]`
-                Command prefix: `{self.prefix}`
-                {cog.description if cog else ""}
-                """),
-            colour=0xFFFF00,
-        )
-        embed.set_author(
-            name=self.menu_author.display_name,
-            icon_url=str(self.menu_author.avatar_url),
-        )
-        for command in await self.filter_commands(command_list):
-            embed.add_field(
-                name=f"{self.prefix}{self.get_command_signature(command)}",
-                value=command.help,
-                inline=False,
-            )
-        embed.set_footer(
-            text=f"Page {menu.current_page+1}/{self.get_max_pages()}")
-        return embed
+        query: str,
+        limit: int = 10,
+    ) -> t.List[t.Tuple[float, commands.Command]]:
+        """Rank the commands by how well their words match a query.
+
+        Each word of the query scores its closest match in each command.
+        Words found as is count fully, the others are looked up by their
+        trigrams, so that misspelled or truncated words still count, if less.
+        """
+        scores: t.Counter[commands.Command] = Counter()
+        for query_word in set(WORD.findall(query.lower())):
+            if query_word in self.used_by:
+                matches = [(1.0, query_word)]
+            else:
+                matches = self.words.similar(query_word, 0.5)[:5]
+            best: t.Dict[commands.Command, float] = {}
+            for score, word in matches:
+                for command in self.used_by[word]:
+                    if score > best.get(command, 0):
+                        best[command] = score
+            scores.update(best)
+        return [(score, command)
+                for command, score in scores.most_common(limit)]
+
+
+class HelpCache:
+    """The parts of the help pages which only change with the commands.
+
+    The signatures, the sorted pages of the global help, their descriptions
+    and the search index are built once, then reused until the bot's
+    `commands_version` changes, which it does whenever an extension adds or
+    removes commands. Each call is left with filtering the commands for its
+    author, and filling the embed : building one is cheaper than copying it.
+    """
+
+    def __init__(self) -> None:
+        self.version = -1
+        self.signatures: t.Dict[commands.Command, str] = {}
+        self.mapping: t.Dict[t.Optional[commands.Cog],
+                             t.List[commands.Command]] = {}
+        self.pages: t.List[Page] = []
+        self.descriptions: t.Dict[t.Tuple[t.Any, str], str] = {}
+        self.index = CommandIndex()
+
+    def refresh(self, bot: commands.Bot) -> None:
+        """Rebuild the cache if the commands changed since."""
+        if self.version == bot.commands_version:
+            return
+        command_list = list(bot.walk_commands())
+        self.signatures = {
+            command: self.signatures.get(command) or build_signature(command)
+            for command in command_list
+        }
+        self.index.update(
+            command for command in command_list if not command.hidden
+            and not any(parent.hidden for parent in command.parents))
+        # Hidden commands are only shown to those who know their name
+        self.mapping = {cog: cog.get_commands() for cog in bot.cogs.values()}
+        self.mapping[None] = [
+            command for command in bot.commands if command.cog is None
+        ]
+        self.pages = [
+            (cog, self.mapping[cog]) for cog in sorted(
+                self.mapping,
+                key=lambda cog: cog.qualified_name if cog else "ZZ")
+            if [command for command in self.mapping[cog] if not command.hidden]
+        ]
+        self.descriptions.clear()
+        self.version = bot.commands_version
+
+    def signature(self, command: commands.Command) -> str:
+        """Get the command's signature."""
+        try:
+            return self.signatures[command]
+        except KeyError:
+            signature = self.signatures[command] = build_signature(command)
+            return signature
+
+    def description(
+        self,
+        key: t.Any,
+        prefix: str,
+        build: t.Callable[[], str],
+    ) -> str:
+        """Get the description of a page, built on first use."""
+        try:
+            return self.descriptions[key, prefix]
+        except KeyError:
+            description = self.descriptions[key, prefix] = build()
+            return description
 
 
 class Help(commands.HelpCommand):
     """The Help cog."""
-    @staticmethod
-    def get_command_signature(command: commands.Command) -> str:
+
+    cache = HelpCache()
+    # Shared by the copies made for each call
+
+    suggestions: t.List[str] = []
+    # Commands whose name is close to the one not found
+
+    def get_command_signature(self, command: commands.Command) -> str:
         """Retrieve the command's signature."""
-        basis = f"{command.qualified_name}"
-        for arg in command.clean_params.values():
-            if arg.kind in {Parameter.VAR_KEYWORD, Parameter.VAR_POSITIONAL}:
-                basis += f" [{arg.name}]"
-            elif (hasattr(getattr(arg.annotation, "type", None), "__args__")
-                  and len(arg.annotation.__args__) == 2
-                  and isinstance(arg.annotation.__args__[-1], type(None))):
-                basis += f" [{arg.name} = None]"
-            elif isinstance(arg.annotation, commands.converter._Greedy):
-                # This is fine as of discord.py 1.7.1
-                # However, this will soon break due to this commit :
-                # https://github.com/Rapptz/discord.py/commit/bcd3a00eaff85262db6903cf194fea563825ad4b#diff-e30bed16d1d422b6da3c37af2512366fd41bd0f71e3f1165dd93a6742770305dL837
-                # But I don't know how to make the code not break due to this change.
-                # So I'll have to monitor this situation
-                basis += f" [{arg.name} = (...)]"
-            elif arg.default == Parameter.empty:
-                basis += f" <{arg.name}>"
-            else:
-                basis += f" [{arg.name} = {arg.default}]"
-        return basis
+        return self.cache.signature(command)
+
+    def get_bot_mapping(
+        self,
+    ) -> t.Dict[t.Optional[commands.Cog], t.List[commands.Command]]:
+        """Get the commands of each cog, from the cache."""
+        return self.cache.mapping
+
+    async def prepare_help_command(
+        self,
+        ctx: commands.Context,
+        command: t.Optional[str] = None,
+    ) -> None:
+        """Rebuild the cache if the commands changed."""
+        self.cache.refresh(ctx.bot)
+        await super().prepare_help_command(ctx, command)
+
+    async def command_callback(
+        self,
+        ctx: commands.Context,
+        *,
+        command: t.Optional[str] = None,
+    ) -> None:
+        """Search the commands on `help search <words>`."""
+        keyword, _, query = (command or "").partition(" ")
+        if keyword != "search" or not query:
+            await super().command_callback(ctx, command=command)
+            return
+        await self.prepare_help_command(ctx, command)
+        await self.send_search_results(query)
+
+    def command_not_found(self, string: str) -> str:
+        """Look for the commands the author could have meant."""
+        self.suggestions = self.cache.index.suggest(string)
+        return super().command_not_found(string)
+
+    def subcommand_not_found(
+        self,
+        command: commands.Command,
+        string: str,
+    ) -> str:
+        """Look for the subcommands the author could have meant."""
+        self.suggestions = self.cache.index.suggest(
+            f"{command.qualified_name} {string}")
+        return super().subcommand_not_found(command, string)
 
     async def send_bot_help(
             self, mapping: t.Dict[commands.Cog,
                                   t.List[commands.Command]]) -> None:
-        """Send the global help."""
+        """Send the global help.
+
+        discord.ext.menus is only imported here, by the first call.
+        """
+        from .help_menu import HelpSource, menus
+
         ctx = self.context
         pages = menus.MenuPages(
             source=HelpSource(
-                self.get_command_signature,
+                self.cache,
                 self.filter_commands,
                 ctx.prefix,
                 ctx.author,
-                mapping,
             ),
             clear_reactions_after=True,
         )
@@ -135,11 +360,15 @@ class Help(commands.HelpCommand):
         ctx = self.context
         embed = discord.Embed(
             title=cog.qualified_name,
-            description=textwrap.dedent(f"""
-                Help syntax : `<Required argument>`. `[Optional argument]`
-                Command prefix: `{ctx.prefix}`
-                {cog.description}
-                """),
+            description=self.cache.description(
+                cog,
+                ctx.prefix,
+                lambda: textwrap.dedent(f"""
+                    {SYNTAX}
+                    Command prefix: `{ctx.prefix}`
+                    {cog.description}
+                    """),
+            ),
             colour=discord.Colour.blue(),
         )
         embed.set_author(
@@ -164,8 +393,7 @@ class Help(commands.HelpCommand):
         ctx = self.context
         embed = discord.Embed(
             title=f"{ctx.prefix}{self.get_command_signature(command)}",
-            description=("Help syntax : `<Required argument>`. "
-                         f"`[Optional argument]`\n{command.help}"),
+            description=f"{SYNTAX}\n{command.help}",
             colour=discord.Colour.blue(),
         )
         if command.aliases:
@@ -193,8 +421,7 @@ class Help(commands.HelpCommand):
         embed = discord.Embed(
             title=(f"Help for group {ctx.prefix}"
                    f"{self.get_command_signature(group)}"),
-            description=("Help syntax : `<Required argument>`. "
-                         f"`[Optional argument]`\n{group.help}"),
+            description=f"{SYNTAX}\n{group.help}",
             colour=discord.Colour.blue(),
         )
         for command in await self.filter_commands(group.commands, sort=True):
@@ -220,9 +447,43 @@ class Help(commands.HelpCommand):
             )
         await ctx.send(embed=embed)
 
+    async def send_search_results(self, query: str) -> None:
+        """Send the commands matching a search."""
+        ctx = self.context
+        results = await self.filter_commands(
+            command for _, command in self.cache.index.search(query))
+        if not results:
+            await self.send_error_message(f'No command matches "{query}".')
+            return
+        embed = discord.Embed(
+            title=f"Commands matching {query}",
+            description=SYNTAX,
+            colour=discord.Colour.blue(),
+        )
+        for command in results:
+            embed.add_field(
+                name=f"{ctx.prefix}{self.get_command_signature(command)}",
+                value=command.help,
+                inline=False,
+            )
+        embed.set_author(
+            name=str(ctx.message.author),
+            icon_url=str(ctx.message.author.avatar_url),
+        )
+        embed.set_thumbnail(url=str(ctx.bot.user.avatar_url))
+        await ctx.send(embed=embed)
+
     async def send_error_message(self, error: str) -> None:
         """Send an error message."""
-        await self.context.bot.httpcat(self.context, 404, error)
+        await self.context.bot.httpcat(
+            self.context,
+            404,
+            error,
+            "Did you mean : " + ", ".join(
+                f"`{self.context.prefix}{name}`"
+                for name in self.suggestions)
+            if self.suggestions else discord.Embed.Empty,
+        )
 
 
 def setup(bot: commands.Bot) -> None:
@@ -237,3 +498,5 @@ def setup(bot: commands.Bot) -> None:
 def teardown(bot: commands.Bot) -> None:
     """Remove the help command."""
     bot.help_command = bot.old_help_command
+    sys.modules.pop("bot.bin.help_menu", None)
+    # Imported again with the new help module on reload
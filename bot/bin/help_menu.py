@@ -0,0 +1,86 @@
+"""The paginated help menu, imported by the first global help.
+
+MIT License.
+
+Copyright (c) 2020-2021 Faholan
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import textwrap
+import typing as t
+
+import discord
+from discord.ext import commands, menus
+
+from .help import SYNTAX, HelpCache, Page
+
+
+class HelpSource(menus.ListPageSource):
+    """The Help menu."""
+
+    def __init__(
+        self,
+        cache: HelpCache,
+        filter_commands: t.Callable[[t.List[commands.Command]], t.Awaitable, ],
+        prefix: str,
+        author: discord.User,
+    ) -> None:
+        """Create the menu."""
+        self.cache = cache
+        self.filter_commands = filter_commands
+        self.prefix = prefix
+        self.menu_author = author
+        super().__init__(cache.pages, per_page=1)
+
+    async def format_page(
+        self,
+        menu: menus.Menu,
+        page: Page,
+    ) -> discord.Embed:
+        """Format the pages."""
+        cog, command_list = page
+        embed = discord.Embed(
+            title=(
+                "Help for "
+                f"{cog.qualified_name if cog else 'unclassified commands'}"),
+            description=self.cache.description(
+                cog,
+                self.prefix,
+                lambda: textwrap.dedent(f"""
+                    {SYNTAX}
+                    Command prefix: `{self.prefix}`
+                    {cog.description if cog else ""}
+                    """),
+            ),
+            colour=0xFFFF00,
+        )
+        embed.set_author(
+            name=self.menu_author.display_name,
+            icon_url=str(self.menu_author.avatar_url),
+        )
+        for command in await self.filter_commands(command_list):
+            embed.add_field(
+                name=f"{self.prefix}{self.cache.signature(command)}",
+                value=command.help,
+                inline=False,
+            )
+        embed.set_footer(
+            text=f"Page {menu.current_page+1}/{self.get_max_pages()}")
+        return embed
@@ -21,14 +21,60 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import ast
+import importlib
+import importlib.util
+import time
 import typing as t
-from asyncio import all_tasks
+from asyncio import all_tasks, gather
+from concurrent.futures import ThreadPoolExecutor
 
 import aiohttp
 import discord
 from discord.ext import commands
 
 from . import sh
+from .errors import ErrorHandlers
+
+
+def imports_of(name: str) -> t.List[str]:
+    """List the modules a module imports when run, without running it."""
+    spec = importlib.util.find_spec(name)
+    with open(spec.origin, encoding="utf-8") as file:
+        tree = ast.parse(file.read(), spec.origin)
+    modules = []
+    for node in tree.body:  # Imports in functions are deferred on purpose
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = importlib.util.resolve_name(
+                "." * node.level + (node.module or ""), spec.parent)
+            modules.append(base)
+            modules.extend(f"{base}.{alias.name}" for alias in node.names)
+            # The names may be submodules, like menus from discord.ext
+    return modules
+
+
+def preimport(name: str, extensions: t.Collection[str]) -> float:
+    """Import what an extension imports, timing it.
+
+    The extension itself isn't imported : load_extension runs its module in
+    any case, so importing it here would run it twice. The same goes for
+    other extensions it may import. Errors are left for load_extension.
+    """
+    start = time.perf_counter()
+    try:
+        modules = imports_of(name)
+    except Exception:  # pylint: disable=broad-except
+        modules = []
+    for module in modules:
+        if module.rpartition(".")[0] in extensions or module in extensions:
+            continue  # Importing a.b imports a first
+        try:
+            importlib.import_module(module)
+        except Exception:  # pylint: disable=broad-except
+            pass  # Not a module, or load_extension reports it
+    return time.perf_counter() - start
 
 
 class AlecMaisEnBot(commands.Bot):
@@ -73,10 +119,49 @@ class AlecMaisEnBot(commands.Bot):
 
         self.extensions_list: t.List[str] = []
 
+        self.lazy_extensions: t.Dict[str, t.Dict[str, t.Dict[str, t.Any]]] = {}
+        # Extensions loaded on the first use of one of their commands, given
+        # with the help, aliases and hidden flag their stubs should show
+        self.lazy_commands: t.Dict[str, t.List[commands.Command]] = {}
+        # The commands standing in for them until then
+
+        self.connect4_workers = 2
+        # Processes running the connect 4 engine
+
+        self.game_sessions: t.Dict[str, float] = {}
+        # Limits on the games played at once, see GameSessionManager
+
+        self.game_store = "games.sqlite3"
+        # Where running games are saved, to resume them after a restart
+
+        self.edit_scheduler = sh.EditScheduler()
+        # Every live message should be edited through this
+
+        self.reactions = sh.ReactionDispatcher()
+        # Messages waiting for reactions should listen through this
+
+        self.error_handlers = ErrorHandlers()
+        # Handlers of command errors, see bin/error.py
+
+        self.commands_version = 0
+        # Bumped whenever a command is added or removed, see bin/help.py
+
         self.guild_id = 0
 
         self.cwkalip = "127.0.0.1:9999"
 
+        self.triggers: t.List[t.Dict[str, t.Any]] = []
+        # Automatic replies, see TriggerEngine. The rules are all in data.py
+
+        self.reply_limits: t.Dict[str, float] = {}
+        # Limits on automatic replies, see ReplyLimiter
+
+        self.log_shipping: t.Dict[str, t.Any] = {}
+        # How errors are batched before being logged, see LogShipper
+
+        self.error_journal_path = "errors.sqlite3"
+        # Where every error is recorded, see ErrorJournal
+
         super().__init__(
             command_prefix="a!",
             intents=self.used_intents,
@@ -88,6 +173,15 @@ class AlecMaisEnBot(commands.Bot):
             raise ValueError(
                 "No log channel configured. One is required to proceed")
 
+        self.reply_limiter = sh.ReplyLimiter(**self.reply_limits)
+        # Listeners replying to messages should check with this first
+
+        self.log_shipper = sh.LogShipper(**self.log_shipping)
+        # Errors should be logged through this
+
+        self.error_journal = sh.ErrorJournal(self.error_journal_path)
+        # And recorded there
+
     async def on_ready(self) -> None:
         """Operations processed when the bot's ready."""
         await self.change_presence(activity=discord.Game("a!help"))
@@ -109,41 +203,119 @@ class AlecMaisEnBot(commands.Bot):
             self.aio_session = aiohttp.ClientSession()
 
             self.log_channel = self.get_channel(self.log_channel_id)
-
-            report = []
-            success = 0
-            for ext in self.extensions_list:
-                if ext not in self.extensions:
-                    try:
-                        self.load_extension(ext)
-                        report.append(f"✅ | **Extension loaded** : `{ext}`")
-                        success += 1
-                    except commands.ExtensionFailed as error:
-                        report.append(
-                            f"❌ | **Extension error** : `{ext}` "
-                            f"({type(error.original)} : {error.original})")
-                    except commands.ExtensionNotFound:
-                        report.append(f"❌ | **Extension not found** : `{ext}`")
-                    except commands.NoEntryPointError:
-                        report.append(f"❌ | **setup not defined** : `{ext}`")
+            self.log_shipper.channel = self.log_channel
+            self.log_shipper.icon_url = self.user.avatar_url_as(
+                static_format="png")
+
+            eager = [
+                ext for ext in self.extensions_list
+                if ext not in self.lazy_extensions
+            ]
+            success, report, timings = await self.load_extensions(eager)
             # Load every single extension
             # Looping on the /cogs and /bin folders does not allow fine control
+            for ext in self.lazy_extensions:
+                self.add_lazy_commands(ext)
+                report.append(f"💤 | **Extension loaded on first use** : "
+                              f"`{ext}`")
 
             embed = discord.Embed(
                 title=(
                     f"{success} extensions were loaded & "
-                    f"{len(self.extensions_list) - success} extensions were "
+                    f"{len(eager) - success} extensions were "
                     "not loaded"),
                 description="\n".join(report),
                 colour=discord.Colour.green(),
             )
+            embed.set_footer(text=timings)
             await self.log_channel.send(embed=embed)
         else:
             await self.log_channel.send("on_ready called again")
 
+    async def load_extensions(
+        self,
+        extensions: t.List[str],
+    ) -> t.Tuple[int, t.List[str], str]:
+        """Load extensions, importing what they import in parallel first.
+
+        Imports are safe in threads, so a thread pool brings the modules the
+        extensions import into sys.modules at once. The extensions are then
+        loaded in order on the loop. Returns the number of extensions loaded,
+        a report line for each one and a summary of the time taken.
+        """
+        start = time.perf_counter()
+        extensions = [ext for ext in extensions
+                      if f"bot.{ext}" not in self.extensions]
+        names = {f"bot.{ext}" for ext in self.extensions_list}
+        with ThreadPoolExecutor(max_workers=min(8, len(extensions) or 1),
+                                thread_name_prefix="import") as pool:
+            results = await gather(*(
+                self.loop.run_in_executor(pool, preimport, f"bot.{ext}",
+                                          names)
+                for ext in extensions))
+        imports = dict(zip(extensions, results))
+        imported = time.perf_counter()
+
+        report = []
+        success = 0
+        for ext in extensions:
+            setup_start = time.perf_counter()
+            try:
+                self.load_extension(ext)
+                report.append(
+                    f"✅ | **Extension loaded** : `{ext}` (imports "
+                    f"{imports[ext] * 1000:.0f}ms, load "
+                    f"{(time.perf_counter() - setup_start) * 1000:.0f}ms)")
+                success += 1
+            except commands.ExtensionFailed as error:
+                report.append(f"❌ | **Extension error** : `{ext}` "
+                              f"({type(error.original)} : {error.original})")
+            except commands.ExtensionNotFound:
+                report.append(f"❌ | **Extension not found** : `{ext}`")
+            except commands.NoEntryPointError:
+                report.append(f"❌ | **setup not defined** : `{ext}`")
+        end = time.perf_counter()
+        return success, report, (
+            f"Imported in {(imported - start) * 1000:.0f}ms, set up in "
+            f"{(end - imported) * 1000:.0f}ms")
+
+    def add_lazy_commands(self, extension: str) -> None:
+        """Register the commands loading a lazy extension on first use."""
+
+        async def activate(ctx: commands.Context, *, arguments: str = ""):
+            """Load the extension, then run the real command."""
+            del arguments  # Parsed again by the real command
+            if f"bot.{extension}" not in self.extensions:
+                self.load_extension(extension)
+            await self.invoke(await self.get_context(ctx.message))
+
+        stubs = []
+        for name, spec in self.lazy_extensions[extension].items():
+            if self.get_command(name) is None:
+                stub = commands.Command(
+                    activate,
+                    name=name,
+                    aliases=list(spec.get("aliases", ())),
+                    help=spec.get("help"),
+                    hidden=spec.get("hidden", False),
+                )
+                self.add_command(stub)
+                stubs.append(stub)
+        self.lazy_commands[extension] = stubs
+
+    def remove_lazy_commands(self, extension: str) -> None:
+        """Remove the commands standing in for a lazy extension."""
+        for stub in self.lazy_commands.pop(extension, ()):
+            if self.get_command(stub.name) is stub:
+                self.remove_command(stub.name)
+
     async def close(self) -> None:
         """Do some cleanup."""
+        await self.log_shipper.flush()
+        self.log_shipper.close()
+        self.error_journal.close()
         await self.aio_session.close()
+        self.edit_scheduler.close()
         for task in all_tasks(loop=self.loop):
             task.cancel()
         for ext in tuple(self.extensions):
@@ -218,6 +390,22 @@ class AlecMaisEnBot(commands.Bot):
         await self.log_channel.send(embed=embed)
         await ctx.send(embed=embed)
 
+    async def on_raw_reaction_add(
+        self,
+        payload: discord.RawReactionActionEvent,
+    ) -> None:
+        """Route the reaction to the message waiting for it."""
+        if payload.user_id != self.user.id:
+            self.reactions.dispatch(payload)
+
+    async def on_raw_reaction_remove(
+        self,
+        payload: discord.RawReactionActionEvent,
+    ) -> None:
+        """Route the reaction to the message waiting for it."""
+        if payload.user_id != self.user.id:
+            self.reactions.dispatch(payload)
+
     async def on_guild_join(self, guild: discord.Guild) -> None:
         """Leave unauthorized guilds."""
         if guild.id != self.guild_id:
@@ -266,30 +454,18 @@ class AlecMaisEnBot(commands.Bot):
     ) -> bool:
         """Get a yes or no reaction-based answer."""
         message = await ctx.send(question)
-        await message.add_reaction("\U00002705")  # ✅
-        await message.add_reaction("\U0000274c")  # ❌
-
-        def check(payload: discord.RawReactionActionEvent) -> bool:
-            """Decide whether or not to process the reaction."""
-            return (
-                payload.message_id,
-                payload.channel_id,
-                payload.user_id,
-            ) == (
-                message.id,
-                message.channel.id,
-                ctx.author.id,
-            ) and payload.emoji.name in {"\U00002705", "\U0000274c"}
-
-        payload = await self.wait_for(
-            "raw_reaction_add",
-            check=check,
-            timeout=timeout,
-        )
-        return payload.emoji.name == "\U00002705"
+        deadline = self.loop.time() + timeout
+        with self.reactions.listen(message.id, (ctx.author.id, )) as listener:
+            await message.add_reaction("\U00002705")  # ✅
+            await message.add_reaction("\U0000274c")  # ❌
+            while True:
+                payload = await listener.get(deadline - self.loop.time())
+                if (payload.event_type == "REACTION_ADD" and
+                        payload.emoji.name in {"\U00002705", "\U0000274c"}):
+                    return payload.emoji.name == "\U00002705"
 
     async def shell(self, ctx, argument: str):
-        with sh.ShellReader(argument) as reader:
+        async with sh.ShellReader(argument) as reader:
             prefix = "```" + reader.highlight
 
             paginator = sh.WrappedPaginator(prefix=prefix, max_size=1975)
@@ -307,19 +483,41 @@ class AlecMaisEnBot(commands.Bot):
 
         await interface.add_line(f"\n[status] Return code {reader.close_code}")
 
+    def add_command(self, command: commands.Command) -> None:
+        """Add a command, invalidating the cached help pages."""
+        super().add_command(command)
+        self.commands_version += 1
+
+    def remove_command(self, name: str) -> t.Optional[commands.Command]:
+        """Remove a command, invalidating the cached help pages."""
+        command = super().remove_command(name)
+        if command is not None:
+            self.commands_version += 1
+        return command
+
     def load_extension(
             self, name: str, *, package: t.Optional[str] = None) -> None:
-        """Load an extension."""
+        """Load an extension, replacing its lazy commands if any."""
         if not name.startswith("bot."):
             name = f"bot.{name}"
-        super().load_extension(name, package=package)
+        extension = name[len("bot."):]
+        self.remove_lazy_commands(extension)
+        try:
+            super().load_extension(name, package=package)
+        except commands.ExtensionError:
+            if extension in self.lazy_extensions:
+                self.add_lazy_commands(extension)
+            raise
 
     def unload_extension(
             self, name: str, *, package: t.Optional[str] = None) -> None:
-        """Unload an extension."""
+        """Unload an extension, which loads again on first use if lazy."""
         if not name.startswith("bot."):
             name = f"bot.{name}"
         super().unload_extension(name, package=package)
+        extension = name[len("bot."):]
+        if extension in self.lazy_extensions:
+            self.add_lazy_commands(extension)
 
     def reload_extension(
             self, name: str, *, package: t.Optional[str] = None) -> None:
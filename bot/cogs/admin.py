@@ -30,6 +30,11 @@ class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize the cog."""
         self.bot = bot
+        bot.error_handlers.register(self.admin_error, AdminError)
+
+    def cog_unload(self) -> None:
+        """Stop handling AdminError."""
+        self.bot.error_handlers.unregister(self.admin_error)
 
     async def cog_check(self, ctx: commands.Context) -> bool:
         """Decide if you can run the command."""
@@ -39,17 +44,14 @@ class Admin(commands.Cog):
             return True
         raise AdminError()
 
-    async def cog_command_error(self, ctx: commands.Context,
-                                error: Exception) -> None:
-        """Call that on error."""
-        if isinstance(error, AdminError):
-            await ctx.bot.httpcat(
-                ctx,
-                401,
-                "Only my owner can use the command " + ctx.invoked_with,
-            )
-            return
-        raise error
+    @staticmethod
+    async def admin_error(ctx: commands.Context, error: AdminError) -> None:
+        """Call that when someone else tries an admin command."""
+        await ctx.bot.httpcat(
+            ctx,
+            401,
+            "Only my owner can use the command " + ctx.invoked_with,
+        )
 
     @commands.command(ignore_extra=True)
     async def load(self, ctx: commands.Context, *extensions) -> None:
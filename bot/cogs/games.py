@@ -21,15 +21,28 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import asyncio
+import sqlite3
+import struct
+import sys
+import threading
+import time
 import traceback
 import typing as t
+import zlib
+from array import array
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from itertools import cycle
-from random import choice, randint, shuffle
+from functools import lru_cache
+from operator import add
+from random import randrange, sample, shuffle
 
 import discord
 from discord.ext import commands, menus
 
+from .. import sh
+
 COLORS = (
     "\U0001f534",
     "\U0001f535",
@@ -43,21 +56,736 @@ BLACK = "\U000026ab"
 WHITE = "\U000026aa"
 
 
-class Connect4(menus.Menu):
-    """How to play connect4."""
+class GameMenu(menus.Menu):
+    """A menu whose message is edited through the bot's edit scheduler.
+
+    Its state is saved after every move, so that it can be resumed after a
+    restart or a reload of the cog.
+    """
+
+    sessions: t.Optional["GameSessionManager"] = None
+    store: t.Optional["GameStore"] = None
+    shared: t.FrozenSet[str] = frozenset()  # Attributes shared between games
+
+    suspended = False  # Stopped only to be resumed later
+    ended = False  # Over for good
+
+    async def run(self, ctx: commands.Context) -> t.Optional[str]:
+        """Play the game, returning what to say once it's over."""
+        await self.start(ctx, wait=True)
+        if self.suspended:
+            return None
+        return self.ending()
+
+    def ending(self) -> t.Optional[str]:
+        """Get what to say once the game is over."""
+        return None
+
+    def suspend(self) -> None:
+        """Stop the game, keeping it saved so that it's resumed later."""
+        self.suspended = True
+        self.stop()
+
+    def dump(self) -> bytes:
+        """Serialize the state of the game."""
+        raise NotImplementedError
+
+    @classmethod
+    async def load(
+        cls,
+        cog: "Games",
+        ctx: commands.Context,
+        state: bytes,
+    ) -> "GameMenu":
+        """Rebuild a game from its serialized state."""
+        raise NotImplementedError
+
+    def save(self) -> None:
+        """Save the state of the game, if it is stored."""
+        if self.store and not self.ended and not self.suspended:
+            self.store.save(self)
+
+    @staticmethod
+    async def fetch_member(
+        ctx: commands.Context,
+        user_id: int,
+    ) -> discord.Member:
+        """Get a member of the game's guild, even if it isn't cached."""
+        if user_id == ctx.me.id:
+            return ctx.me
+        return (ctx.guild.get_member(user_id)
+                or await ctx.guild.fetch_member(user_id))
+
+    async def edit_message(self, **kwargs) -> None:
+        """Edit the message, ahead of bulk output in the same channel."""
+        await self.bot.edit_scheduler.edit(
+            self.message,
+            priority=sh.PRIORITY_INTERACTIVE,
+            **kwargs,
+        )
+
+    @property
+    def listeners(self) -> t.Set[int]:
+        """IDs of the users whose reactions are processed."""
+        return {
+            self._author_id,
+            self.bot.owner_id,
+            *(self.bot.owner_ids or ()),
+        } - {None}
+
+    async def _internal_loop(self) -> None:
+        """Process the reactions the bot routes to this menu.
+
+        This replaces the `wait_for` loop of menus, whose checks are run
+        for every reaction the bot sees.
+        """
+        timed_out = False
+        loop = self.bot.loop
+        listener = self.bot.reactions.listen(self.message.id, self.listeners)
+        self.save()
+        try:
+            deadline = loop.time() + self.timeout
+            while self._running:
+                try:
+                    payload = await listener.get(deadline - loop.time())
+                except asyncio.TimeoutError:
+                    timed_out = True
+                    break
+                if self.reaction_check(payload):
+                    deadline = loop.time() + self.timeout
+                    loop.create_task(self.update(payload))
+        finally:
+            listener.close()
+            # Cancelled without being stopped means the bot is shutting down
+            self.ended = not self.suspended and (timed_out
+                                                 or not self._running)
+            self._event.set()
+            try:
+                await self.finalize(timed_out)
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+            if self.ended and not self.bot.is_closed():
+                await self.clean_up()
+
+    async def clean_up(self) -> None:
+        """Delete the message or its reactions, as configured."""
+        try:
+            if self.delete_message_after:
+                await self.message.delete()
+            elif self.clear_reactions_after:
+                if self._can_remove_reactions:
+                    await self.message.clear_reactions()
+                    return
+                for emoji in self.buttons:
+                    try:
+                        await self.message.remove_reaction(
+                            emoji, self.bot.user)
+                    except discord.HTTPException:
+                        continue
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    async def update(self, payload: discord.RawReactionActionEvent) -> None:
+        """Process a reaction, and remember the game is still played."""
+        if self.sessions:
+            self.sessions.touch(self)
+        await super().update(payload)
+        self.save()
+
+    async def finalize(self, timed_out: bool) -> None:
+        """Free the game's session, and forget it if it's over."""
+        if self.sessions:
+            self.sessions.close(self)
+        if self.store and self.ended:
+            self.store.delete(self.message.id)
+
+    def memory(self) -> int:
+        """Estimate the bytes used by this game alone."""
+        size = sys.getsizeof(self) + sys.getsizeof(vars(self))
+        for name, value in vars(self).items():
+            if name in self.shared:
+                continue
+            size += sys.getsizeof(value)
+            if isinstance(value, dict):
+                size += sum(map(sys.getsizeof, value.values()))
+            elif isinstance(value, (list, tuple, set, deque)):
+                size += sum(map(sys.getsizeof, value))
+        return size
+
+
+class GameStore:
+    """Keep the state of running games in SQLite.
+
+    Games are saved after every move. Only the latest state of each game is
+    kept, and forgotten once the game is over. Saving only takes note of
+    the state : a background task writes the latest ones in batches, in a
+    thread of their own which is the only one to touch the database.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection: t.Optional[sqlite3.Connection] = None
+        self.executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix="games")
+        self.pending: t.Dict[int, t.Optional[t.Tuple]] = {}
+        # The latest row of each game, None to delete it
+        self.task: t.Optional[asyncio.Task] = None
+        self.closed = False
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, from the store's thread."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path,
+                                              isolation_level=None,
+                                              check_same_thread=False)
+            # Each save is a tiny write : don't wait for the disk every time
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS games (
+                message_id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                channel_id INTEGER NOT NULL,
+                command_id INTEGER NOT NULL,
+                state BLOB NOT NULL
+            )""")
+        return self.connection
+
+    def save(self, game: GameMenu) -> None:
+        """Save the current state of a game."""
+        if self.closed:
+            return
+        self.pending[game.message.id] = (
+            game.message.id,
+            type(game).__name__,
+            game.message.channel.id,
+            game.ctx.message.id,
+            game.dump(),
+        )
+        self.schedule()
+
+    def delete(self, message_id: int) -> None:
+        """Forget a game."""
+        if self.closed:
+            return
+        self.pending[message_id] = None
+        self.schedule()
+
+    def schedule(self) -> None:
+        """Make sure the pending changes will be written."""
+        if not self.task or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        """Write the pending changes until there are none left."""
+        loop = asyncio.get_event_loop()
+        while self.pending:
+            batch, self.pending = self.pending, {}
+            await loop.run_in_executor(self.executor, self.write, batch)
+
+    def write(self, batch: t.Dict[int, t.Optional[t.Tuple]]) -> None:
+        """Write changes, in a single transaction."""
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    "DELETE FROM games WHERE message_id = ?",
+                    [(message_id, ) for message_id, row in batch.items()
+                     if row is None])
+                connection.executemany(
+                    "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?)",
+                    [row for row in batch.values() if row is not None])
+        except sqlite3.Error:
+            traceback.print_exc()
+
+    async def games(self) -> t.List[t.Tuple[int, str, int, int, bytes]]:
+        """Get every saved game."""
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor,
+            lambda: self.connect().execute(
+                "SELECT message_id, kind, channel_id, command_id, state "
+                "FROM games").fetchall(),
+        )
+
+    def close(self) -> None:
+        """Write what's left, and close the database."""
+        self.closed = True
+        if self.task:
+            self.task.cancel()
+        batch, self.pending = self.pending, {}
+
+        def finish() -> None:
+            if batch:
+                self.write(batch)
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+
+        self.executor.submit(finish)
+        self.executor.shutdown(wait=True)
+
+
+class GameSession:  # pylint: disable=too-few-public-methods
+    """A game being played."""
+
+    __slots__ = ("game", "user_id", "channel_id", "started", "last_active")
+
+    def __init__(self, game: GameMenu, user_id: int, channel_id: int) -> None:
+        self.game = game
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.started = self.last_active = time.monotonic()
+
+
+class GameSessionManager:
+    """Keep track of the games being played.
+
+    Sessions are kept from the least to the most recently active, so the
+    idlest games are always found first. Games are capped for the whole bot,
+    for each user and for each channel. When the bot is full, the idlest game
+    makes room if it was left alone long enough, and games idle for too long
+    are closed anyway. The menus' own timeout is pushed past that, so that
+    it is only a backstop.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 200,
+        per_user: int = 3,
+        per_channel: int = 10,
+        idle_timeout: float = 300.0,
+        evict_after: float = 60.0,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.per_user = per_user
+        self.per_channel = per_channel
+        self.idle_timeout = idle_timeout
+        self.evict_after = evict_after
+
+        self.sessions: t.OrderedDict[GameMenu, GameSession] = OrderedDict()
+        self.users: t.Counter[int] = Counter()
+        self.channels: t.Counter[int] = Counter()
+        self.task: t.Optional[asyncio.Task] = None
+        self.evicted = 0
+
+    def open(self, game: GameMenu, ctx: commands.Context) -> t.Optional[str]:
+        """Register a game about to start.
+
+        Returns why it can't be played, if it can't.
+        """
+        if self.users[ctx.author.id] >= self.per_user:
+            return (f"You already have {self.per_user} games running, finish "
+                    "one of them first")
+        if self.channels[ctx.channel.id] >= self.per_channel:
+            return "There are too many games in this channel, try another one"
+        if len(self.sessions) >= self.max_sessions:
+            idlest = next(iter(self.sessions.values()))
+            if time.monotonic() - idlest.last_active < self.evict_after:
+                return "I'm running too many games right now, try again later"
+            self.evict(idlest)
+
+        self.sessions[game] = GameSession(game, ctx.author.id, ctx.channel.id)
+        self.users[ctx.author.id] += 1
+        self.channels[ctx.channel.id] += 1
+        game.sessions = self
+        game.timeout = 2 * self.idle_timeout
+        # The sweep ends idle games after idle_timeout * 1.25 at most
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.sweep())
+        return None
+
+    def touch(self, game: GameMenu) -> None:
+        """Mark a game as just played."""
+        session = self.sessions.get(game)
+        if session:
+            session.last_active = time.monotonic()
+            self.sessions.move_to_end(game)
+
+    def close(self, game: GameMenu) -> None:
+        """Forget a game that ended."""
+        session = self.sessions.pop(game, None)
+        if session is None:
+            return
+        for counter, key in ((self.users, session.user_id),
+                             (self.channels, session.channel_id)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+
+    def evict(self, session: GameSession) -> None:
+        """End a game to make room."""
+        self.close(session.game)
+        self.evicted += 1
+        session.game.stop()
+
+    async def sweep(self) -> None:
+        """End the games left alone for too long, while there are games."""
+        while self.sessions:
+            await asyncio.sleep(self.idle_timeout / 4)
+            deadline = time.monotonic() - self.idle_timeout
+            while self.sessions:
+                session = next(iter(self.sessions.values()))
+                if session.last_active > deadline:
+                    break
+                self.evict(session)
+
+    def stop(self) -> None:
+        """Stop watching for idle games. Running games aren't ended."""
+        if self.task:
+            self.task.cancel()
+
+
+class Connect4Board:
+    """A connect 4 game, stored as one bitboard per player.
+
+    Each column takes 7 bits : 6 for its cells from the bottom up, and an
+    always empty one on top, so that shifting never wraps to another column.
+    """
+
+    WIDTH = 7
+    HEIGHT = 6
+    COLUMN_BITS = HEIGHT + 1
+    SIZE = WIDTH * HEIGHT
+
+    BOTTOM = sum(1 << shift
+                 for shift in range(0, WIDTH * COLUMN_BITS, COLUMN_BITS))
+    BOARD = BOTTOM * ((1 << HEIGHT) - 1)
+    COLUMNS = tuple(
+        map(((1 << HEIGHT) - 1).__lshift__,
+            range(0, WIDTH * COLUMN_BITS, COLUMN_BITS)))
+    # Vertical, horizontal and both diagonals
+    DIRECTIONS = (1, COLUMN_BITS, COLUMN_BITS - 1, COLUMN_BITS + 1)
+
+    def __init__(self) -> None:
+        """Create an empty board."""
+        self.boards = [0, 0]
+        self.heights = [column * self.COLUMN_BITS for column in range(self.WIDTH)]
+        self.history: t.List[int] = []
+
+    @property
+    def turn(self) -> int:
+        """Index of the player whose turn it is."""
+        return len(self.history) & 1
+
+    @property
+    def mask(self) -> int:
+        """Every occupied cell."""
+        return self.boards[0] | self.boards[1]
+
+    @property
+    def key(self) -> int:
+        """Unique key of the position, from the current player's view."""
+        return self.boards[self.turn] + self.mask
+
+    def can_play(self, column: int) -> bool:
+        """Check if the column isn't full."""
+        return (self.heights[column] - column * self.COLUMN_BITS
+                < self.HEIGHT)
+
+    def play(self, column: int) -> int:
+        """Drop a token in the column, returning the player who played."""
+        player = self.turn
+        self.boards[player] |= 1 << self.heights[column]
+        self.heights[column] += 1
+        self.history.append(column)
+        return player
+
+    def undo(self) -> int:
+        """Remove the last token, returning its column."""
+        column = self.history.pop()
+        self.heights[column] -= 1
+        self.boards[self.turn] ^= 1 << self.heights[column]
+        return column
+
+    @classmethod
+    def is_win(cls, board: int) -> bool:
+        """Check if a bitboard holds four aligned tokens."""
+        for shift in cls.DIRECTIONS:
+            pairs = board & (board >> shift)
+            if pairs & (pairs >> 2 * shift):
+                return True
+        return False
+
+    @classmethod
+    def threats(cls, board: int, mask: int) -> int:
+        """Get the empty cells which would complete four for this bitboard."""
+        result = (board << 1) & (board << 2) & (board << 3)
+        for shift in cls.DIRECTIONS[1:]:
+            pairs = (board << shift) & (board << 2 * shift)
+            result |= pairs & (board << 3 * shift)
+            result |= pairs & (board >> shift)
+            pairs = (board >> shift) & (board >> 2 * shift)
+            result |= pairs & (board << shift)
+            result |= pairs & (board >> 3 * shift)
+        return result & (cls.BOARD ^ mask)
+
+    def has_won(self, player: int) -> bool:
+        """Check if a player won."""
+        return self.is_win(self.boards[player])
+
+    @property
+    def full(self) -> bool:
+        """Check if the game is a draw, should nobody have won."""
+        return len(self.history) == self.SIZE
+
+    def cell(self, column: int, row: int) -> int:
+        """Get a cell : 0 if empty, else 1 + the index of its player."""
+        bit = 1 << (column * self.COLUMN_BITS + row)
+        if self.boards[0] & bit:
+            return 1
+        if self.boards[1] & bit:
+            return 2
+        return 0
+
+
+class SearchTimeout(Exception):
+    """The time budget of a search ran out."""
 
-    def __init__(self, *players, **kwargs) -> None:
-        """Initialize the game."""
+
+class Connect4Search:
+    """Negamax search with alpha-beta pruning.
+
+    Positions are a pair of bitboards : the current player's tokens, and
+    every token. Values are from the current player's point of view.
+    """
+
+    ORDER = (3, 2, 4, 1, 5, 0, 6)  # Center columns are usually better
+    WIN = 1000
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    # Shared by every search of a worker process, positions don't change
+    table: t.OrderedDict[int, t.Tuple[int, int, int]] = OrderedDict()
+    table_size = 1 << 18
+
+    def __init__(self, deadline: float) -> None:
+        """Prepare a search that must end before the deadline."""
+        self.deadline = deadline
+        self.nodes = 0
+
+    @staticmethod
+    def count(board: int) -> int:
+        """Count the tokens of a bitboard."""
+        return bin(board).count("1")
+
+    def evaluate(self, position: int, mask: int) -> int:
+        """Heuristic value : the difference in pending threats."""
+        return (self.count(Connect4Board.threats(position, mask)) -
+                self.count(Connect4Board.threats(position ^ mask, mask)))
+
+    def negamax(  # pylint: disable=too-many-arguments, too-many-branches
+        self,
+        position: int,
+        mask: int,
+        moves: int,
+        depth: int,
+        alpha: int,
+        beta: int,
+    ) -> int:
+        """Get the value of a position."""
+        self.nodes += 1
+        if not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        possible = (mask + Connect4Board.BOTTOM) & Connect4Board.BOARD
+        if not possible:
+            return 0
+        if Connect4Board.threats(position, mask) & possible:
+            return self.WIN - moves - 1
+        if depth == 0:
+            return self.evaluate(position, mask)
+
+        original_alpha = alpha
+        key = position + mask
+        entry = self.table.get(key)
+        if entry is not None:
+            self.table.move_to_end(key)
+            entry_depth, flag, value = entry
+            if entry_depth >= depth:
+                if flag == self.EXACT:
+                    return value
+                if flag == self.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best = -self.WIN
+        for column in self.ORDER:
+            move = possible & Connect4Board.COLUMNS[column]
+            if not move:
+                continue
+            value = -self.negamax(
+                position ^ mask,
+                mask | move,
+                moves + 1,
+                depth - 1,
+                -beta,
+                -alpha,
+            )
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            flag = self.UPPER
+        elif best >= beta:
+            flag = self.LOWER
+        else:
+            flag = self.EXACT
+        self.table[key] = (depth, flag, best)
+        self.table.move_to_end(key)
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+        return best
+
+    def best_move(
+        self,
+        board: Connect4Board,
+        depth: int,
+    ) -> t.Tuple[int, int, int]:
+        """Search deeper and deeper, until the depth or the deadline.
+
+        Returns the column, its value and the depth fully searched.
+        """
+        position = board.boards[board.turn]
+        mask = board.mask
+        moves = len(board.history)
+        order = [
+            column for column in self.ORDER if board.can_play(column)
+        ]
+        best_column, best_value, reached = order[0], 0, 0
+        for current_depth in range(1, depth + 1):
+            alpha, beta = -self.WIN, self.WIN
+            column_found, value_found = order[0], -self.WIN
+            try:
+                for column in order:
+                    move = ((mask + Connect4Board.BOTTOM)
+                            & Connect4Board.COLUMNS[column])
+                    if Connect4Board.is_win(position | move):
+                        return column, self.WIN - moves - 1, current_depth
+                    value = -self.negamax(
+                        position ^ mask,
+                        mask | move,
+                        moves + 1,
+                        current_depth - 1,
+                        -beta,
+                        -alpha,
+                    )
+                    if value > value_found:
+                        column_found, value_found = column, value
+                        alpha = max(alpha, value)
+            except SearchTimeout:
+                break
+            best_column, best_value, reached = (
+                column_found,
+                value_found,
+                current_depth,
+            )
+            # Search the best move first next time
+            order.remove(best_column)
+            order.insert(0, best_column)
+            if abs(best_value) >= self.WIN - Connect4Board.SIZE:
+                break  # The outcome is known
+        return best_column, best_value, reached
+
+
+def connect4_search(
+    history: t.List[int],
+    depth: int,
+    budget: float,
+) -> t.Tuple[int, int, int, int, float]:
+    """Find the best move after these moves. Runs in a worker process.
+
+    Returns the column, its value, the depth reached, the number of nodes
+    searched and the time it took.
+    """
+    start = time.perf_counter()
+    board = Connect4Board()
+    for column in history:
+        board.play(column)
+    search = Connect4Search(start + budget)
+    column, value, reached = search.best_move(board, depth)
+    return column, value, reached, search.nodes, time.perf_counter() - start
+
+
+class Connect4Engine:
+    """The bot's side of a connect 4 game."""
+
+    def __init__(
+        self,
+        pool: ProcessPoolExecutor,
+        depth: int,
+        budget: float,
+    ) -> None:
+        """Set the strength of the engine."""
+        self.pool = pool
+        self.depth = depth
+        self.budget = budget
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.last_report = ""
+
+    @property
+    def rate(self) -> float:
+        """Nodes searched per second, over the whole game."""
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    async def choose(self, board: Connect4Board) -> int:
+        """Pick a column, without blocking the event loop."""
+        loop = asyncio.get_event_loop()
+        column, _, reached, nodes, elapsed = await loop.run_in_executor(
+            self.pool,
+            connect4_search,
+            list(board.history),
+            self.depth,
+            self.budget,
+        )
+        self.nodes += nodes
+        self.elapsed += elapsed
+        self.last_report = (
+            f"I searched {nodes:,} positions up to depth {reached} "
+            f"({nodes / elapsed if elapsed else 0:,.0f} nodes/s)")
+        return column
+
+
+class Connect4(GameMenu):
+    """How to play connect4.
+
+    Its state is both players, the engine's strength (a depth of 0 when
+    there's no engine), then one byte per move.
+    """
+
+    state_format = struct.Struct("<QQBf")
+
+    def __init__(
+        self,
+        *players,
+        engine: t.Optional[Connect4Engine] = None,
+        **kwargs,
+    ) -> None:
+        """Initialize the game.
+
+        With an engine, the second player is the bot.
+        """
         super().__init__(**kwargs)
         self.winner = None
-        self.id_dict = {players[i].id: i + 1 for i in range(len(players))}
-        self.ids = cycle(list(self.id_dict))
+        self.draw = False
         self.players = players
-        self.next = next(self.ids, None)
+        self.engine = engine
         self.status = [
             ":black_large_square:", ":green_circle:", ":red_circle:"
         ]
-        self.state = [[0 for _ in range(6)] for __ in range(7)]
+        self.board = Connect4Board()
+
+    @property
+    def next(self) -> int:
+        """ID of the player whose turn it is."""
+        return self.players[self.board.turn].id
 
     async def on_menu_button_error(self, exc) -> None:
         """Manage exceptions."""
@@ -84,6 +812,11 @@ class Connect4(menus.Menu):
                 "Please check the logs for Connect 4")
             raise exc from None
 
+    @property
+    def listeners(self) -> t.Set[int]:
+        """IDs of the players."""
+        return {player.id for player in self.players}
+
     def reaction_check(self, payload: discord.RawReactionActionEvent) -> bool:
         """Whether or not to process the payload."""
         if payload.message_id != self.message.id:
@@ -94,8 +827,10 @@ class Connect4(menus.Menu):
     def get_embed(self) -> discord.Embed:
         """Generate the next embed."""
         return discord.Embed(description="\n".join([
-            "".join([self.status[column[5 - i]] for column in self.state])
-            for i in range(6)
+            "".join([
+                self.status[self.board.cell(column, row)]
+                for column in range(Connect4Board.WIDTH)
+            ]) for row in reversed(range(Connect4Board.HEIGHT))
         ]))
 
     async def send_initial_message(
@@ -115,48 +850,35 @@ class Connect4(menus.Menu):
         payload: discord.RawReactionActionEvent,
     ) -> None:
         """Do something."""
-        if 0 not in self.state[number]:
+        if payload.user_id != self.next or not self.board.can_play(number):
+            return
+        if self.play(number) or not self.engine:
+            await self.embed_updating()
             return
-        self.next = next(self.ids, None)
-        next_id = self.id_dict[payload.user_id]
-        self.state[number][self.state[number].index(0)] = next_id
+
         await self.embed_updating()
-        check = self.check(next_id)
-        if check:
-            self.winner = self.players[next_id - 1]
-            return self.stop()
-
-    def check(self, user_id: int) -> bool:
-        """Did you win."""
-        schema = str(user_id) + 3 * f", {user_id}"
-        if any(schema in str(x) for x in self.state):
+        self.play(await self.engine.choose(self.board))
+        await self.embed_updating()
+
+    def play(self, column: int) -> bool:
+        """Play a column, returning whether the game ended."""
+        player = self.board.play(column)
+        if self.board.has_won(player):
+            self.winner = self.players[player]
+            self.stop()
+            return True
+        if self.board.full:
+            self.draw = True
+            self.stop()
             return True
-        for i in range(6):
-            if schema in str([column[i] for column in self.state]):
-                return True
-        for diagonal in range(3):
-            lines = [
-                [self.state[3 + diagonal - i][i] for i in range(4 + diagonal)],
-                [
-                    self.state[i - diagonal - 4][-i - 1]
-                    for i in range(4 + diagonal)
-                ],
-                [self.state[i - diagonal - 4][i] for i in range(4 + diagonal)],
-                [
-                    self.state[3 + diagonal - i][-i - 1]
-                    for i in range(4 + diagonal)
-                ],
-            ]
-            if any(schema in str(line) for line in lines):
-                return True
         return False
 
     async def embed_updating(self) -> None:
         """Update the embed."""
-        await self.message.edit(
-            content=self.players[self.id_dict[self.next] - 1].mention,
-            embed=self.get_embed(),
-        )
+        content = self.players[self.board.turn].mention
+        if self.engine and self.engine.last_report:
+            content += f"\n{self.engine.last_report}"
+        await self.edit_message(content=content, embed=self.get_embed())
 
     @menus.button("1\N{variation selector-16}\N{combining enclosing keycap}")
     async def column_1(self, payload: discord.RawReactionActionEvent) -> None:
@@ -198,14 +920,230 @@ class Connect4(menus.Menu):
         """Stop."""
         self.stop()
 
-    async def prompt(self, ctx: commands.Context) -> discord.User:
-        """Start it the real way."""
-        await self.start(ctx, wait=True)
-        return self.winner
-
-
-class Mastermind(menus.Menu):
-    """Play Mastermind."""
+    def ending(self) -> str:
+        """Announce the winner."""
+        if self.winner:
+            ending = f"{self.winner.mention} won !"
+        elif self.draw:
+            ending = "It's a draw !"
+        else:
+            ending = "Game cancelled"
+        if self.engine and self.engine.nodes:
+            ending += (f"\nI searched {self.engine.nodes:,} positions in "
+                       f"{self.engine.elapsed:.2f}s "
+                       f"({self.engine.rate:,.0f} nodes/s)")
+        return ending
+
+    def dump(self) -> bytes:
+        """Serialize the players, the engine and the moves."""
+        return self.state_format.pack(
+            self.players[0].id,
+            self.players[1].id,
+            self.engine.depth if self.engine else 0,
+            self.engine.budget if self.engine else 0.0,
+        ) + bytes(self.board.history)
+
+    @classmethod
+    async def load(
+        cls,
+        cog: "Games",
+        ctx: commands.Context,
+        state: bytes,
+    ) -> "Connect4":
+        """Rebuild a game, replaying its moves."""
+        first, second, depth, budget = cls.state_format.unpack_from(state)
+        game = cls(
+            await cls.fetch_member(ctx, first),
+            await cls.fetch_member(ctx, second),
+            engine=Connect4Engine(cog.pool, depth, budget) if depth else None,
+            clear_reactions_after=True,
+        )
+        for column in state[cls.state_format.size:]:
+            game.board.play(column)
+        return game
+
+
+class MastermindScorer:
+    """Score Mastermind codes, encoded as integers.
+
+    A code is the base `colors` number whose digits are its pegs. Scores are
+    `blacks * (length + 1) + whites`, which is `blacks * length + common`
+    where `common` is the number of pegs both codes share, whatever their
+    position. Scores are computed a whole row (one guess against every code)
+    at a time, and rows are kept : on small games, that's every score.
+
+    Scorers are shared by every game, and hints are computed in threads :
+    the kept rows are only changed under a lock, so that threads and the
+    loop may score at the same time.
+    """
+
+    table_memory = 1 << 22  # Bytes of rows kept
+    guess_budget = 400000  # Scores looked at to choose a guess
+
+    def __init__(self, length: int, colors: int) -> None:
+        """Prepare the codes of a game."""
+        self.length = length
+        self.colors = colors
+        self.size = colors**length
+
+        # For each position and colour, `length` where codes have that
+        # colour in that position, 0 elsewhere
+        self.matches = []
+        for position in range(length):
+            block = colors**(length - 1 - position)
+            self.matches.append([
+                (bytes(block * color) + bytes((length, )) * block +
+                 bytes(block * (colors - color - 1))) * (self.size //
+                                                         (block * colors))
+                for color in range(colors)
+            ])
+
+        # Codes using the same colours the same number of times share a
+        # signature, common pegs only depend on them
+        signatures: t.Dict[t.Tuple[int, ...], int] = {}
+        self.signature_index = []
+        for code in range(self.size):
+            digits = self.decode(code)
+            signature = tuple(digits.count(color) for color in range(colors))
+            self.signature_index.append(
+                signatures.setdefault(signature, len(signatures)))
+        self.signatures = list(signatures)
+        self.commons: t.Dict[int, bytes] = {}
+
+        self.rows: t.Dict[int, bytes] = {}
+        self.max_rows = max(1, self.table_memory // self.size)
+        self.lock = threading.Lock()
+
+    def encode(self, digits: t.Sequence[int]) -> int:
+        """Get the code of a sequence of colours."""
+        code = 0
+        for digit in digits:
+            code = code * self.colors + digit
+        return code
+
+    def decode(self, code: int) -> t.List[int]:
+        """Get the sequence of colours of a code."""
+        digits = []
+        for _ in range(self.length):
+            code, digit = divmod(code, self.colors)
+            digits.append(digit)
+        return digits[::-1]
+
+    def common(self, signature: int) -> bytes:
+        """Get the common pegs of a signature with every other one."""
+        common = self.commons.get(signature)
+        if common is None:
+            counts = self.signatures[signature]
+            common = bytes(
+                sum(map(min, counts, other)) for other in self.signatures)
+            with self.lock:
+                self.commons[signature] = common
+        return common
+
+    def row(self, guess: int) -> bytes:
+        """Get the scores of a guess against every code."""
+        row = self.rows.get(guess)
+        if row is None:
+            row = bytes(
+                map(
+                    self.common(self.signature_index[guess]).__getitem__,
+                    self.signature_index,
+                ))
+            for position, digit in enumerate(self.decode(guess)):
+                row = bytes(map(add, row, self.matches[position][digit]))
+            with self.lock:
+                if len(self.rows) >= self.max_rows:
+                    del self.rows[next(iter(self.rows))]
+                self.rows[guess] = row
+        return row
+
+    def score(self, guess: int, secret: int) -> int:
+        """Score a guess."""
+        return self.row(guess)[secret]
+
+    def feedback(self, guess: int, secret: int) -> t.Tuple[int, int]:
+        """Get the black and white pegs a guess earns."""
+        return divmod(self.score(guess, secret), self.length + 1)
+
+    def candidates(
+        self,
+        history: t.Iterable[t.Tuple[int, int]],
+    ) -> t.List[int]:
+        """Get the codes which could still be the secret."""
+        remaining = range(self.size)
+        for guess, score in history:
+            row = self.row(guess)
+            remaining = [code for code in remaining if row[code] == score]
+        return list(remaining)
+
+    def next_guess(self, candidates: t.List[int]) -> int:
+        """Choose the guess whose worst answer leaves the fewest codes.
+
+        This is Knuth's minimax. On big games, only a sample of the
+        remaining codes is tried.
+        """
+        if len(candidates) == self.size:
+            # The same every game : two pegs of each colour, as Knuth did
+            return self.encode(
+                [min(i // 2, self.colors - 1) for i in range(self.length)])
+        if len(candidates) <= 2:
+            return candidates[0]
+
+        # Rows that aren't kept have to be built again for every guess
+        cost = len(candidates)
+        if self.size > self.max_rows:
+            cost += self.size // 8
+        tries = self.guess_budget // cost
+        if tries >= self.size:
+            guesses: t.Sequence[int] = range(self.size)
+        elif tries >= len(candidates):
+            guesses = candidates
+        else:
+            guesses = sorted(sample(candidates, max(1, tries)))
+
+        possible = set(candidates)
+        best_key = None
+        best_guess = candidates[0]
+        for guess in guesses:
+            row = self.row(guess)
+            partitions = [0] * ((self.length + 1)**2)
+            for code in candidates:
+                partitions[row[code]] += 1
+            key = (max(partitions), guess not in possible)
+            if best_key is None or key < best_key:
+                best_key, best_guess = key, guess
+        return best_guess
+
+    def solve(self, secret: int) -> t.List[t.Tuple[int, int]]:
+        """Find a secret, returning each guess made and its score."""
+        history: t.List[t.Tuple[int, int]] = []
+        candidates = list(range(self.size))
+        win = self.length * (self.length + 1)
+        while True:
+            guess = self.next_guess(candidates)
+            score = self.score(guess, secret)
+            history.append((guess, score))
+            if score == win:
+                return history
+            row = self.row(guess)
+            candidates = [code for code in candidates if row[code] == score]
+
+
+@lru_cache(maxsize=8)
+def mastermind_scorer(length: int, colors: int) -> MastermindScorer:
+    """Get the scorer of a kind of game, shared by every game."""
+    return MastermindScorer(length, colors)
+
+
+class Mastermind(GameMenu):
+    """Play Mastermind.
+
+    Its state is the length, tries, whether it's over, the secret, the dots
+    of the line being made, then each guess with its score.
+    """
+
+    state_format = struct.Struct("<BBBBIB")
+    guess_format = struct.Struct("<IB")
 
     def __init__(self, tries: int, **kwargs) -> None:
         """Initialize the mastermind."""
@@ -214,7 +1152,9 @@ class Mastermind(menus.Menu):
         self.cur_try = 1
         self.lines: t.List[str] = []
         self.length = kwargs.pop("length", 4)
-        self.secret = [choice(COLORS) for _ in range(self.length)]
+        self.scorer = mastermind_scorer(self.length, len(COLORS))
+        self.secret = randrange(self.scorer.size)
+        self.history: t.List[t.Tuple[int, int]] = []
         self.current: t.List[str] = []
         self.finished = False
         super().__init__(clear_reactions_after=clear_reactions_after, **kwargs)
@@ -262,7 +1202,7 @@ class Mastermind(menus.Menu):
             return
         if len(self.current) < self.length:
             self.current.append(color)
-            await self.message.edit(content=self.content)
+            await self.edit_message(content=self.content)
 
     @menus.button("\U0001f534")
     async def red(self, _: discord.RawReactionActionEvent) -> None:
@@ -301,65 +1241,110 @@ class Mastermind(menus.Menu):
             return
         if self.current:
             self.current.pop()
-            await self.message.edit(content=self.content)
+            await self.edit_message(content=self.content)
+
+    @menus.button("\U0001f4a1")
+    async def hint(self, _: discord.RawReactionActionEvent) -> None:
+        """Fill the line with the best guess."""
+        if self.finished:
+            return
+        guess = await asyncio.get_event_loop().run_in_executor(
+            None,
+            lambda: self.scorer.next_guess(
+                self.scorer.candidates(self.history)),
+        )
+        self.current = [COLORS[digit] for digit in self.scorer.decode(guess)]
+        await self.edit_message(content=self.content)
 
     @menus.button("\U00002705")
     async def validate(self, _: discord.RawReactionActionEvent) -> None:
         """Try the current configuration."""
         if self.finished:
             return
-        if len(self.current) != 4:
+        if len(self.current) != self.length:
             return
 
-        start = "".join(self.current) + " " * 10
+        guess = self.scorer.encode([COLORS.index(dot) for dot in self.current])
+        score = self.scorer.score(guess, self.secret)
+        self.history.append((guess, score))
+        self.lines.append(self.line(guess, score))
 
-        if self.current == self.secret:
+        if score == self.length * (self.length + 1):
             self.finished = True
-            self.lines.append(start + BLACK * 4)
             self.lines.append("You won !")
+        elif self.cur_try == self.max_tries:
+            self.finished = True
+            self.lines.append("You lost !")
         else:
-            current = self.current.copy()
-            secret = self.secret.copy()
-
-            result = []
-
-            i = 0
-            while i < len(current):
-                if current[i] == secret[i]:
-                    result.append(BLACK)
-                    current.pop(i)
-                    secret.pop(i)
-                else:
-                    i += 1
-            for elem in current:
-                if elem in secret:
-                    result.append(WHITE)
-                    secret.remove(elem)
-
-            shuffle(result)
-
-            self.lines.append(start + "".join(result))
-
-            if self.cur_try == self.max_tries:
-                self.finished = True
-                self.lines.append("You lost !")
-            else:
-                self.cur_try += 1
+            self.cur_try += 1
 
         self.current = []
-        await self.message.edit(content=self.content)
+        await self.edit_message(content=self.content)
+
+    def line(self, guess: int, score: int) -> str:
+        """Show a guess and its score, with the pegs in no particular order."""
+        blacks, whites = divmod(score, self.length + 1)
+        result = [BLACK] * blacks + [WHITE] * whites
+        shuffle(result)
+        return ("".join(COLORS[digit] for digit in self.scorer.decode(guess))
+                + " " * 10 + "".join(result))
+
+    def dump(self) -> bytes:
+        """Serialize the secret, the line being made and the guesses."""
+        return b"".join((
+            self.state_format.pack(
+                self.length,
+                self.max_tries,
+                self.cur_try,
+                self.finished,
+                self.secret,
+                len(self.current),
+            ),
+            bytes(COLORS.index(dot) for dot in self.current),
+            *(self.guess_format.pack(*guess) for guess in self.history),
+        ))
+
+    @classmethod
+    async def load(
+        cls,
+        cog: "Games",
+        ctx: commands.Context,
+        state: bytes,
+    ) -> "Mastermind":
+        """Rebuild a game, writing its lines again."""
+        (length, tries, cur_try, finished, secret,
+         current) = cls.state_format.unpack_from(state)
+        game = cls(tries, length=length)
+        game.cur_try = cur_try
+        game.finished = bool(finished)
+        game.secret = secret
+        offset = cls.state_format.size
+        game.current = [
+            COLORS[digit] for digit in state[offset:offset + current]
+        ]
+        game.history = list(
+            cls.guess_format.iter_unpack(state[offset + current:]))
+
+        game.lines.append(f"{ctx.author.mention}'s Mastermind "
+                          "(Turn {cur}/{total})")
+        game.lines.extend(game.line(*guess) for guess in game.history)
+        if game.finished:
+            won = game.history[-1][1] == length * (length + 1)
+            game.lines.append("You won !" if won else "You lost !")
+        return game
 
     @menus.button("\U0001f504")
     async def restart(self, _: discord.RawReactionActionEvent) -> None:
         """Restart the game."""
-        self.secret = [choice(COLORS) for _ in range(self.length)]
+        self.secret = randrange(self.scorer.size)
+        self.history = []
         self.cur_try = 1
 
         self.finished = False
         self.lines = self.lines[:1]
         self.current = []
 
-        await self.message.edit(content=self.content)
+        await self.edit_message(content=self.content)
 
     @menus.button("\N{BLACK SQUARE FOR STOP}\ufe0f")
     async def on_stop(self, _: discord.RawReactionActionEvent) -> None:
@@ -368,73 +1353,158 @@ class Mastermind(menus.Menu):
 
 
 # The minesweeper is under the AGPL version 3 or any later version. Copyright Amelia Coutard.
-class Minesweeper(menus.Menu):
-    def __init__(self, difficulty):
+MINESWEEPER_NUMBERS = (
+    "  ",
+    "1 ",
+    "2 ",
+    "3 ",
+    "4 ",
+    "5 ",
+    "6 ",
+    "7 ",
+    "8 ",
+    "  ",
+)
+# Characters left for the board in a message, once the code block and the
+# viewport's position are added
+MINESWEEPER_ROOM = 1900
+MINESWEEPER_VIEW_WIDTH = 32
+
+
+@lru_cache(maxsize=16)
+def neighbour_table(width, height):
+    """Get the indexes of the neighbours of each cell of a flat board."""
+    table = []
+    for y in range(height):
+        for x in range(width):
+            table.append(tuple(
+                ny * width + nx
+                for ny in range(max(0, y - 1), min(height, y + 2))
+                for nx in range(max(0, x - 1), min(width, x + 2))
+                if nx != x or ny != y))
+    return tuple(table)
+
+
+class Minesweeper(GameMenu):
+    """Play minesweeper.
+
+    Its state is the size, the cursor, the viewport and whether the mines
+    were placed, then the board and the revealed cells, compressed.
+    """
+
+    state_format = struct.Struct("<HHHHHHHH?")
+    difficulties = {
+        "easy": (8, 8, 10),
+        "medium": (16, 16, 40),
+        "hard": (32, 32, 99),
+    }
+    max_size = 128
+    shared = frozenset(("neighbours", ))
+
+    def __init__(self, width, height, bomb_count):
         super().__init__()
-        if difficulty == "easy":
-            self.width = 8
-            self.height = 8
-            self.bomb_count = 10
-        elif difficulty == "medium":
-            self.width = 16
-            self.height = 16
-            self.bomb_count = 40
-        elif difficulty == "hard":
-            self.width = 32
-            self.height = 32
-            self.bomb_count = 99
-
-        self.board = [[0 for j in range(self.width)]
-                      for i in range(self.height)]
-        self.revealed = [[False for j in range(self.width)]
-                         for i in range(self.height)]
+        self.width = width
+        self.height = height
+        self.bomb_count = bomb_count
+
         self.x = self.width // 2
         self.y = self.height // 2
 
-        for _ in range(self.bomb_count):
-            x = randint(0, self.width - 1)
-            y = randint(0, self.height - 1)
-            while self.board[y][x] == -1:
-                x = randint(0, self.width - 1)
-                y = randint(0, self.height - 1)
-            self.board[y][x] = -1
-        for y, row in enumerate(self.board):
-            for x, cell in enumerate(row):
-                if cell != -1:
-                    bombs = 0
-                    if x > 0 and y > 0 and self.board[y - 1][x - 1] == -1:
-                        bombs += 1
-                    if y > 0 and self.board[y - 1][x] == -1:
-                        bombs += 1
-                    if x < self.width - 1 and y > 0 and self.board[y -
-                                                                   1][x +
-                                                                      1] == -1:
-                        bombs += 1
-                    if x < self.width - 1 and self.board[y][x + 1] == -1:
-                        bombs += 1
-                    if (x < self.width - 1 and y < self.height - 1
-                            and self.board[y + 1][x + 1] == -1):
-                        bombs += 1
-                    if y < self.height - 1 and self.board[y + 1][x] == -1:
-                        bombs += 1
-                    if x > 0 and y < self.height - 1 and self.board[y + 1][
-                            x - 1] == -1:
-                        bombs += 1
-                    if x > 0 and self.board[y][x - 1] == -1:
-                        bombs += 1
-                    self.board[y][x] = bombs
+        # Boards are flat, cell (x, y) is at index y * width + x
+        # Mines are only placed on the first dig, so that it's always safe
+        self.board = None
+        self.revealed = bytearray(self.width * self.height)
+        self.neighbours = neighbour_table(self.width, self.height)
+        self.safe_left = self.width * self.height - self.bomb_count
+
+        # Rendered rows, without the cursor. None when they need a rebuild
+        self.rows = [None] * self.height
+        self.view_width, self.view_height = self.viewport_size(
+            self.width, self.height)
+        self.top = 0
+        self.left = 0
 
         self.failed = False
         self.won = False
 
-    async def play(self, ctx):
-        await self.start(ctx, wait=True)
+    @classmethod
+    def parse_size(cls, difficulty, mines=None):
+        """Get the width, height and mine count asked for.
+
+        Returns None if the difficulty can't be understood.
+        """
+        if difficulty in cls.difficulties:
+            width, height, default_mines = cls.difficulties[difficulty]
+        else:
+            try:
+                width, height = map(int, difficulty.split("x"))
+            except ValueError:
+                return None
+            if not (2 <= width <= cls.max_size and 2 <= height <= cls.max_size):
+                return None
+            default_mines = width * height * 15 // 100
+        if mines is None:
+            mines = default_mines
+        if not 1 <= mines <= width * height - 1:
+            return None
+        return width, height, mines
+
+    def place_mines(self, safe_cell):
+        """Place the mines anywhere but around the first dug cell."""
+        forbidden = {safe_cell, *self.neighbours[safe_cell]}
+        if self.width * self.height - len(forbidden) < self.bomb_count:
+            forbidden = {safe_cell}  # Too crowded to keep the area clear
+        candidates = [
+            cell for cell in range(self.width * self.height)
+            if cell not in forbidden
+        ]
+        mines = sample(candidates, self.bomb_count)
+
+        self.board = array("b", bytes(self.width * self.height))
+        for mine in mines:
+            self.board[mine] = -1
+        for mine in mines:
+            for neighbour in self.neighbours[mine]:
+                if self.board[neighbour] != -1:
+                    self.board[neighbour] += 1
+
+    def ending(self):
         if self.failed:
             return "HA, you failed !"
         if self.won:
             return "Congrats !"
         return "Game Over."
 
+    def dump(self):
+        """Serialize the board and the revealed cells."""
+        cells = bytes(self.board) if self.board is not None else b""
+        return self.state_format.pack(
+            self.width,
+            self.height,
+            self.bomb_count,
+            self.x,
+            self.y,
+            self.left,
+            self.top,
+            self.safe_left,
+            self.board is not None,
+        ) + zlib.compress(cells + self.revealed, 1)
+
+    @classmethod
+    async def load(cls, cog, ctx, state):
+        """Rebuild a game from its cells."""
+        (width, height, bomb_count, x, y, left, top, safe_left,
+         placed) = cls.state_format.unpack_from(state)
+        game = cls(width, height, bomb_count)
+        game.x, game.y = x, y
+        game.left, game.top = left, top
+        game.safe_left = safe_left
+        cells = zlib.decompress(state[cls.state_format.size:])
+        if placed:
+            game.board = array("b", cells[:width * height])
+        game.revealed = bytearray(cells[-width * height:])
+        return game
+
     async def send_initial_message(self, ctx, _):
         return await ctx.send(self.render())
 
@@ -442,116 +1512,262 @@ class Minesweeper(menus.Menu):
     async def on_left(self, _):
         if self.x > 0:
             self.x -= 1
-        await self.message.edit(content=self.render())
+        await self.edit_message(content=self.render())
 
     @menus.button("\N{UPWARDS BLACK ARROW}")
     async def on_up(self, _):
         if self.y > 0:
             self.y -= 1
-        await self.message.edit(content=self.render())
+        await self.edit_message(content=self.render())
 
     @menus.button("\N{BLACK RIGHTWARDS ARROW}")
     async def on_right(self, _):
         if self.x < self.width - 1:
             self.x += 1
-        await self.message.edit(content=self.render())
+        await self.edit_message(content=self.render())
 
     @menus.button("\N{DOWNWARDS BLACK ARROW}")
     async def on_down(self, _):
         if self.y < self.height - 1:
             self.y += 1
-        await self.message.edit(content=self.render())
+        await self.edit_message(content=self.render())
 
     @menus.button("🚩")
     async def on_flag(self, _):
-        self.revealed[self.y][self.x] = 2
-        await self.message.edit(content=self.render())
+        cell = self.y * self.width + self.x
+        if self.revealed[cell] != 1:
+            self.revealed[cell] = 2
+            self.rows[self.y] = None
+        await self.edit_message(content=self.render())
 
     @menus.button("\N{PICK}")
     async def on_hole(self, _):
-        if self.board[self.y][self.x] == -1:
+        if self.board is None:
+            self.place_mines(self.y * self.width + self.x)
+        if self.board[self.y * self.width + self.x] == -1:
             self.failed = True
             self.stop()
             return
-        self.revealed[self.y][self.x] = 1
-        if self.board[self.y][self.x] == 0:
-            self.propagate(self.x, self.y)
-        await self.message.edit(content=self.render())
+        newly_revealed = self.propagate(self.x, self.y)
+        self.safe_left -= len(newly_revealed)
+        for cell in newly_revealed:
+            self.rows[cell // self.width] = None
+        if not self.safe_left:
+            self.won = True
+            self.stop()
+            return
+        await self.edit_message(content=self.render())
 
     @menus.button("\N{BLACK SQUARE FOR STOP}\ufe0f")
     async def on_stop(self, _):
         self.stop()
 
     def propagate(self, x, y):
-        if x > 0 and self.revealed[y][x - 1] != 1:
-            self.revealed[y][x - 1] = 1
-            if self.board[y][x - 1] == 0:
-                self.propagate(x - 1, y)
-        if x < self.width - 1 and self.revealed[y][x + 1] != 1:
-            self.revealed[y][x + 1] = 1
-            if self.board[y][x + 1] == 0:
-                self.propagate(x + 1, y)
-        if y > 0 and self.revealed[y - 1][x] != 1:
-            self.revealed[y - 1][x] = 1
-            if self.board[y - 1][x] == 0:
-                self.propagate(x, y - 1)
-        if y < self.height - 1 and self.revealed[y + 1][x] != 1:
-            self.revealed[y + 1][x] = 1
-            if self.board[y + 1][x] == 0:
-                self.propagate(x, y + 1)
+        """Reveal a cell, and the whole region around it if it's a zero.
+
+        Returns the set of newly revealed cells.
+        """
+        start = y * self.width + x
+        newly_revealed = set()
+        if self.revealed[start] == 1:
+            return newly_revealed
+
+        self.revealed[start] = 1
+        newly_revealed.add(start)
+        queue = deque((start,))
+        while queue:
+            cell = queue.popleft()
+            if self.board[cell]:
+                continue  # Numbered cells border the region
+            for neighbour in self.neighbours[cell]:
+                if self.revealed[neighbour] != 1:
+                    self.revealed[neighbour] = 1
+                    newly_revealed.add(neighbour)
+                    queue.append(neighbour)
+        return newly_revealed
+
+    @staticmethod
+    def viewport_size(width, height):
+        """Get how much of the board fits in a message."""
+        # Each cell is two characters wide, each row ends with a newline
+        if (2 * width + 1) * height <= MINESWEEPER_ROOM:
+            return width, height
+        view_width = min(width, MINESWEEPER_VIEW_WIDTH)
+        return view_width, min(height,
+                               MINESWEEPER_ROOM // (2 * view_width + 1))
+
+    def scroll(self):
+        """Move the viewport just enough for the cursor to be in it."""
+        if self.x < self.left:
+            self.left = self.x
+        elif self.x >= self.left + self.view_width:
+            self.left = self.x - self.view_width + 1
+        if self.y < self.top:
+            self.top = self.y
+        elif self.y >= self.top + self.view_height:
+            self.top = self.y - self.view_height + 1
+
+    def render_row(self, y):
+        row = []
+        for cell in range(y * self.width, (y + 1) * self.width):
+            state = self.revealed[cell]
+            if state == 0:
+                row.append("██")
+            elif state == 1:
+                row.append(MINESWEEPER_NUMBERS[self.board[cell]])
+            else:
+                row.append("▶ ")
+        return "".join(row)
 
     def render(self):
-        result = "```"
-        for y, row in enumerate(zip(self.board, self.revealed)):
-            for x, cell in enumerate(zip(row[0], row[1])):
-                if x == self.x and y == self.y:
-                    result += "XX"
-                elif cell[1] == 0:
-                    result += "██"
-                elif cell[1] == 1:
-                    result += [
-                        "  ",
-                        "1 ",
-                        "2 ",
-                        "3 ",
-                        "4 ",
-                        "5 ",
-                        "6 ",
-                        "7 ",
-                        "8 ",
-                        "  ",
-                    ][cell[0]]
-                elif cell[1] == 2:
-                    result += "▶ "
-            result += "\n"
-        result += "```"
+        self.scroll()
+        lines = []
+        for y in range(self.top, self.top + self.view_height):
+            row = self.rows[y]
+            if row is None:
+                row = self.rows[y] = self.render_row(y)
+            if y == self.y:
+                row = row[:2 * self.x] + "XX" + row[2 * self.x + 2:]
+            if self.view_width != self.width:
+                row = row[2 * self.left:2 * (self.left + self.view_width)]
+            lines.append(row)
+        result = "```" + "\n".join(lines) + "\n```"
+        if (self.view_width, self.view_height) != (self.width, self.height):
+            result = (f"Columns {self.left + 1}-"
+                      f"{self.left + self.view_width}/{self.width}, rows "
+                      f"{self.top + 1}-{self.top + self.view_height}/"
+                      f"{self.height}\n" + result)
         return result
 
 
+GAMES: t.Dict[str, t.Type[GameMenu]] = {
+    game.__name__: game
+    for game in (Connect4, Mastermind, Minesweeper)
+}
+
+
 class Games(commands.Cog):
     """Good games."""
 
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize Games."""
         self.bot = bot
+        self._pool: t.Optional[ProcessPoolExecutor] = None
+        self.sessions = GameSessionManager(**bot.game_sessions)
+        self.store = GameStore(bot.game_store)
+        self.resuming = bot.loop.create_task(self.resume_games())
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Get the process pool the connect 4 engine runs in."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.bot.connect4_workers)
+        return self._pool
+
+    def cog_unload(self) -> None:
+        """Do some cleanup. Running games are resumed once reloaded."""
+        self.resuming.cancel()
+        for game in list(self.sessions.sessions):
+            game.suspend()
+        self.sessions.stop()
+        self.store.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    async def play_game(
+        self,
+        game: GameMenu,
+        ctx: commands.Context,
+        resumed: bool = False,
+    ) -> None:
+        """Register a game, play it and announce how it ended."""
+        refusal = self.sessions.open(game, ctx)
+        if refusal:
+            if resumed:
+                self.store.delete(game.message.id)
+            else:
+                await ctx.send(refusal)
+            return
+        game.store = self.store
+        ending = await game.run(ctx)
+        if ending:
+            await ctx.send(ending)
+
+    async def resume_game(
+        self,
+        kind: str,
+        channel_id: int,
+        message_id: int,
+        command_id: int,
+        state: bytes,
+    ) -> None:
+        """Reattach a saved game to its message."""
+        channel = self.bot.get_channel(channel_id)
+        try:
+            if channel is None:
+                raise LookupError(channel_id)
+            message = await channel.fetch_message(message_id)
+            ctx = await self.bot.get_context(await
+                                             channel.fetch_message(command_id))
+            game = await GAMES[kind].load(self, ctx, state)
+        except (LookupError, discord.HTTPException, struct.error, zlib.error):
+            # The game can't be played anymore
+            self.store.delete(message_id)
+            return
+        game.message = message
+        await self.play_game(game, ctx, resumed=True)
+
+    async def resume_games(self) -> None:
+        """Resume the games that were running before a restart or reload."""
+        await self.bot.wait_until_ready()
+        for message_id, kind, channel_id, command_id, state in (
+                await self.store.games()):
+            self.bot.loop.create_task(
+                self.resume_game(kind, channel_id, message_id, command_id,
+                                 state))
 
     @commands.command(aliases=["c4"])
-    async def connect4(self, ctx: commands.Context,
-                       member: discord.Member) -> None:
-        """Play connect 4 with a friend."""
+    async def connect4(
+        self,
+        ctx: commands.Context,
+        member: t.Optional[discord.Member] = None,
+        difficulty: str = "medium",
+    ) -> None:
+        """Play connect 4 with a friend, or against me.
+
+        Without a member (or if you mention me), you play against me.
+        Difficulty may then be easy (depth 2, 0.5s per move), medium (depth 6, 2s per move) or hard (depth 42, 5s per move)
+        """
         if member == ctx.author:
             await ctx.send("You can't play with only yourself !")
             return
-        if member.bot:
+
+        engine = None
+        if member is None or member == ctx.me:
+            difficulty = difficulty.lower().strip()
+            difficulties = {
+                "easy": (2, 0.5),
+                "medium": (6, 2.0),
+                "hard": (Connect4Board.SIZE, 5.0),
+            }
+            if difficulty not in difficulties:
+                await ctx.send(
+                    "difficulty must be one of `easy`, `medium` or `hard`")
+                return
+            member = ctx.me
+            engine = Connect4Engine(self.pool, *difficulties[difficulty])
+        elif member.bot:
             await ctx.send("This member is a bot. Play with a human !")
             return
 
-        winner = await Connect4(ctx.author, member,
-                                clear_reactions_after=True).prompt(ctx)
-        if winner:
-            await ctx.send(f"{winner.mention} won !")
-        else:
-            await ctx.send("Game cancelled")
+        game = Connect4(
+            ctx.author,
+            member,
+            engine=engine,
+            clear_reactions_after=True,
+        )
+        await self.play_game(game, ctx)
 
     @commands.command(aliases=["master"])
     async def mastermind(self,
@@ -560,33 +1776,110 @@ class Games(commands.Cog):
         """Play Mastermind in Discord.
 
         Difficulty may be easy (12 tries), medium (10 tries) or hard (8 tries)
+        Use the \U0001f4a1 reaction to get a hint, or `solve` to watch me play
         """
 
         difficulty = difficulty.lower().strip()
+        if difficulty == "solve":
+            scorer = mastermind_scorer(4, len(COLORS))
+            secret = randrange(scorer.size)
+            start = time.perf_counter()
+            history = await self.bot.loop.run_in_executor(
+                None, scorer.solve, secret)
+            elapsed = time.perf_counter() - start
+            lines = []
+            for guess, score in history:
+                blacks, whites = divmod(score, scorer.length + 1)
+                lines.append(
+                    "".join(COLORS[digit] for digit in scorer.decode(guess)) +
+                    " " * 10 + BLACK * blacks + WHITE * whites)
+            lines.append(f"Solved in {len(history)} tries ({elapsed:.2f}s)")
+            await ctx.send("\n".join(lines))
+            return
+
         difficulties = {"easy": 12, "medium": 10, "hard": 8}
         if difficulty not in difficulties:
             await ctx.send(
-                "difficulty must be one of `easy`, `medium` or `hard`")
+                "difficulty must be one of `easy`, `medium`, `hard` or `solve`")
             return
 
-        await Mastermind(difficulties[difficulty]).start(ctx)
+        await self.play_game(Mastermind(difficulties[difficulty]), ctx)
 
     @commands.command(aliases=["mines"])
-    async def minesweeper(self, ctx: commands.Context, difficulty="easy"):
+    async def minesweeper(
+        self,
+        ctx: commands.Context,
+        difficulty: str = "easy",
+        mines: t.Optional[int] = None,
+    ) -> None:
         """Play minesweeper in Discord.
 
-        Difficulty may be easy (8x8, 10 mines), medium (16x16, 40 mines) or hard (32x32, 99 mines)
-        At the beginning, a random cell holding the number zero is revealed
+        Difficulty may be easy (8x8, 10 mines), medium (16x16, 40 mines), hard (32x32, 99 mines) or a custom size such as 64x64, optionally followed by a number of mines
+        Your first dig is always safe
         """
-        difficulty = difficulty.lower().strip()
-        if difficulty not in {"easy", "medium", "hard"}:
+        size = Minesweeper.parse_size(difficulty.lower().strip(), mines)
+        if size is None:
             await ctx.send(
-                "difficulty must be one of `easy`, `medium` or `hard`")
+                "difficulty must be one of `easy`, `medium`, `hard` or a size "
+                f"such as `64x64` (up to {Minesweeper.max_size}x"
+                f"{Minesweeper.max_size}), followed by a valid number of "
+                "mines")
             return
 
-        mine = Minesweeper(difficulty)
-        ending = await mine.play(ctx)
-        await ctx.send(ending)
+        await self.play_game(Minesweeper(*size), ctx)
+
+    @commands.command(name="sessions", hidden=True)
+    @commands.is_owner()
+    async def sessions_info(self, ctx: commands.Context) -> None:
+        """Show the games being played."""
+        manager = self.sessions
+        now = time.monotonic()
+        kinds: t.Counter[str] = Counter()
+        memory = 0
+        for game in manager.sessions:
+            kinds[type(game).__name__] += 1
+            memory += game.memory()
+
+        embed = discord.Embed(
+            title=(f"{len(manager.sessions)}/{manager.max_sessions} games "
+                   "running"),
+            colour=discord.Colour.blue(),
+        )
+        embed.add_field(
+            name="Games",
+            value="\n".join(f"{kind} : {count}"
+                            for kind, count in kinds.most_common()) or "None",
+        )
+        embed.add_field(
+            name="Limits",
+            value=(f"{manager.per_user} per user, {manager.per_channel} per "
+                   f"channel\nIdle games end after {manager.idle_timeout:.0f}s"
+                   f"\n{manager.evicted} games ended for inactivity"),
+        )
+        if manager.sessions:
+            idlest = next(iter(manager.sessions.values()))
+            embed.add_field(
+                name="Activity",
+                value=(f"{len(manager.users)} players in "
+                       f"{len(manager.channels)} channels\nIdlest game : "
+                       f"{now - idlest.last_active:.0f}s"),
+            )
+        reactions = self.bot.reactions
+        embed.add_field(
+            name="Reactions",
+            value=(f"{reactions.listeners} listeners\n"
+                   f"{reactions.stats['routed']} routed, "
+                   f"{reactions.stats['dropped']} ignored"),
+        )
+        embed.add_field(
+            name="Memory",
+            value=(f"~{memory / 1024:.1f} KiB in games\n"
+                   f"{mastermind_scorer.cache_info().currsize} Mastermind "
+                   f"scorers, {neighbour_table.cache_info().currsize} "
+                   "Minesweeper tables shared"),
+            inline=False,
+        )
+        await ctx.send(embed=embed)
 
 
 def setup(bot: commands.Bot) -> None:
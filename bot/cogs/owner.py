@@ -23,14 +23,22 @@ SOFTWARE.
 
 import asyncio
 import io
+import re
 import textwrap
+import time
 import traceback
 import typing as t
 from contextlib import redirect_stdout
+from datetime import datetime
 
 import discord
 from discord.ext import commands
 
+from ..importtime import profiler
+
+DURATION = re.compile(r"(\d+)([smhd])")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
 
 class OwnerError(commands.CheckFailure):
     """Error specific to this cog."""
@@ -45,6 +53,7 @@ class Owner(commands.Cog, command_attrs={"help": "Owner command"}):
         self._last_result = None
         self._stat_conn: t.Any = None
         self._stat_lock: t.Any = None
+        bot.error_handlers.register(self.owner_error, OwnerError)
 
     @staticmethod
     def cleanup_code(content: str) -> str:
@@ -62,20 +71,18 @@ class Owner(commands.Cog, command_attrs={"help": "Owner command"}):
             return True
         raise OwnerError()
 
-    async def cog_command_error(self, ctx: commands.Context,
-                                error: Exception) -> None:
-        """Call that on error."""
-        if isinstance(error, OwnerError):
-            await ctx.bot.httpcat(
-                ctx,
-                401,
-                "Only my owner can use the command " + ctx.invoked_with,
-            )
-            return
-        raise error
+    @staticmethod
+    async def owner_error(ctx: commands.Context, error: OwnerError) -> None:
+        """Call that when someone else tries an owner command."""
+        await ctx.bot.httpcat(
+            ctx,
+            401,
+            "Only my owner can use the command " + ctx.invoked_with,
+        )
 
     def cog_unload(self):
         """Do some cleanup."""
+        self.bot.error_handlers.unregister(self.owner_error)
         if self._stat_conn:
             asyncio.create_task(self.bot.pool.release(self._stat_conn))
         self.bot.remove_listener(self.stats_listener)
@@ -127,6 +134,102 @@ class Owner(commands.Cog, command_attrs={"help": "Owner command"}):
                 self._last_result = ret
                 await ctx.send(f"```py\n{value}{ret}\n```")
 
+    @commands.command(name="startup-profile")
+    async def startup_profile(self, ctx: commands.Context,
+                              count: int = 20) -> None:
+        """Show the slowest imports, like python -X importtime."""
+        if not profiler.records:
+            await ctx.send("Imports are only timed when the bot is started "
+                           "with `python -m bot`")
+            return
+        lines = [f"{'self [ms]':>9} | {'cumulative':>10} | module"]
+        for record in profiler.slowest(count):
+            lines.append(f"{record.self_time * 1000:9.1f} | "
+                         f"{record.cumulative * 1000:10.1f} | "
+                         f"{'  ' * record.depth}{record.name}")
+        lazy = [
+            ext for ext in self.bot.lazy_extensions
+            if f"bot.{ext}" not in self.bot.extensions
+        ]
+        embed = discord.Embed(
+            title=(f"{len(profiler.records)} modules imported in "
+                   f"{profiler.total * 1000:.0f}ms"),
+            description="```\n" + "\n".join(lines)[:2000] + "\n```",
+            colour=discord.Colour.blue(),
+        )
+        embed.add_field(
+            name="Not loaded yet",
+            value=", ".join(f"`{ext}`" for ext in lazy) or "None",
+        )
+        await ctx.send(embed=embed)
+
+    @commands.command(name="errors")
+    async def errors_search(self, ctx: commands.Context, *query: str) -> None:
+        """Search the error journal.
+
+        a!errors since 1h type=KeyError limit=5 lists the errors, and
+        fingerprint=<hex> shows a traceback
+        """
+        since = 86400
+        filters: t.Dict[str, str] = {}
+        words = iter(query)
+        for word in words:
+            key, _, value = word.partition("=")
+            if key == "since" and not value:
+                value = next(words, "")
+            if key not in {"since", "type", "fingerprint", "limit"}:
+                await ctx.send(f"I don't know how to search by `{key}`")
+                return
+            filters[key] = value
+        try:
+            if "since" in filters:
+                match = DURATION.fullmatch(filters["since"])
+                if not match:
+                    raise ValueError
+                since = int(match[1]) * DURATION_UNITS[match[2]]
+            fingerprint = (int(filters["fingerprint"], 16)
+                           if "fingerprint" in filters else None)
+            if fingerprint is not None and fingerprint >= 1 << 63:
+                fingerprint -= 1 << 64
+            limit = max(1, min(int(filters.get("limit", 10)), 10))
+        except ValueError:
+            await ctx.send("Durations are like `30m`, `1h` or `2d`, "
+                           "fingerprints hexadecimal and limits numbers")
+            return
+
+        summaries = await self.bot.error_journal.query(
+            time.time() - since,
+            filters.get("type"),
+            fingerprint,
+            limit,
+        )
+        if not summaries:
+            await ctx.send("No error found, congratulations")
+            return
+
+        if fingerprint is not None:
+            summary = summaries[0]
+            await ctx.send(
+                f"**{summary.error_type}** : {summary.message[:200]}\n"
+                f"{summary.count} times, last in {summary.context[:300]}\n"
+                f"```py\n{summary.traceback[-1400:]}\n```")
+            return
+
+        embed = discord.Embed(
+            title=f"Errors of the last {filters.get('since', '1d')}",
+            colour=discord.Colour.red(),
+        )
+        for summary in summaries:
+            embed.add_field(
+                name=(f"{summary.error_type} × {summary.count} "
+                      f"({summary.fingerprint % (1 << 64):016x})"),
+                value=(f"Last at {datetime.utcfromtimestamp(summary.last):%c}"
+                       f", in {summary.kind} {summary.context[:150]}\n"
+                       f"{summary.message[:200]}"),
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
     @commands.command()
     async def sh(self, ctx: commands.Context, *, argument: str):
         """Execute an arbitrary command."""
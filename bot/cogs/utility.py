@@ -16,12 +16,12 @@ You should have received a copy of the GNU Affero General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import re
-from random import randint
-
 import discord
 from discord.ext import commands
 
+from .. import dice
+from ..triggers import TriggerEngine
+
 
 class Utility(commands.Cog):
     """Alec mais en utile."""
@@ -29,70 +29,104 @@ class Utility(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         """Initialize the cog."""
         self.bot = bot
-        self.rollre = re.compile(r"\s*(\d+d?\d*)", re.I)
-        self.signre = re.compile(r"\s*(\+|-)\s*")
+        self.triggers = TriggerEngine(bot.triggers)
 
-    @commands.command()
+    @commands.group(invoke_without_command=True)
     async def roll(self, ctx, *, prompt: str) -> None:
-        """Roll one or more dices."""
-        total = 0
-        detailed = []
-        positive = True
-        while prompt:
-            match = self.rollre.match(prompt.lower())
-            if match is None:
-                await ctx.send("Sorry, I couldn't understand your prompt")
-                return
-            prompt = prompt[match.end():].lower()
-            if "d" in match.group(1):
-                num, rawdice = match.group(1).split("d")
-                dice = int(rawdice)
-                if rawdice == "0":
-                    await ctx.send("Sorry, 0-face dices don't exist")
-                    return
-                for _ in range(int(num)):
-                    roll = randint(1, dice)
-                    if positive:
-                        total += roll
-                        detailed.append(f"+ {roll}")
-                    else:
-                        total -= roll
-                        detailed.append(f"- {roll}")
-            else:
-                value = int(match.group(1))
-                if positive:
-                    total += value
-                    detailed.append(f"+ {value}")
-                else:
-                    total -= value
-                    detailed.append(f"- {value}")
-
-            match = self.signre.match(prompt)
-            if match is None:
-                if re.match(r"\s*\Z", prompt):
-                    prompt = ""
-                else:
-                    await ctx.send("Unrecognized sign !")
-            else:
-                prompt = prompt[match.end():]
-                positive = match.group(1) == "+"
-
-        await ctx.send(f"Rolled a **{total}** ({' '.join(detailed)[2:]})")
+        """Roll one or more dices.
+
+        Dices are written like 2d6 or d%, and may be added, subtracted or multiplied, with parentheses
+        2d6! makes sixes explode, 4d6kh3 keeps the 3 highest dices and 4d6dl1 drops the lowest one (kl and dh also exist)
+        """
+        try:
+            expression = dice.parse(prompt)
+            total, detail = await self.bot.loop.run_in_executor(
+                None, expression.roll)
+        except dice.DiceError as error:
+            await ctx.send(str(error))
+            return
+
+        total_text = str(total)
+        if len(total_text) > 100:
+            total_text = f"{total_text[:20]}… ({len(total_text)} digits)"
+        message = f"Rolled a **{total_text}** ({detail})"
+        if len(message) > 2000:
+            message = message[:1998] + "…)"
+        await ctx.send(message)
+
+    @roll.command()
+    async def stats(self, ctx, *, prompt: str) -> None:
+        """Get the exact odds of a roll.
+
+        Shows the mean, the spread and the percentiles of the expression, with a histogram
+        """
+        try:
+            expression = dice.parse(prompt)
+            distribution = await self.bot.loop.run_in_executor(
+                None, expression.distribution)
+        except dice.DiceError as error:
+            await ctx.send(str(error))
+            return
+
+        embed = discord.Embed(
+            title=f"Statistics of {expression}"[:256],
+            colour=discord.Colour.blue(),
+        )
+        embed.add_field(name="Mean", value=f"{distribution.mean:,.3f}")
+        embed.add_field(
+            name="Variance",
+            value=(f"{distribution.variance:,.3f} "
+                   f"(σ = {distribution.variance**0.5:,.3f})"),
+        )
+        embed.add_field(
+            name="Range",
+            value=f"{distribution.minimum:,} to {distribution.maximum:,}",
+        )
+        embed.add_field(
+            name="Percentiles",
+            value=" | ".join(
+                f"{percent}% : {distribution.percentile(percent):,}"
+                for percent in (5, 25, 50, 75, 95)),
+            inline=False,
+        )
+        embed.description = "```\n" + "\n".join(
+            distribution.histogram()) + "\n```"
+        await ctx.send(embed=embed)
+
+    @commands.command(name="triggers", hidden=True)
+    @commands.is_owner()
+    async def triggers_info(self, ctx: commands.Context) -> None:
+        """Show how often each automatic reply was sent."""
+        hits = self.triggers.hits
+        names = dict.fromkeys(trigger.name
+                              for trigger in self.triggers.triggers)
+        embed = discord.Embed(
+            title=f"{len(names)} automatic replies",
+            description="\n".join(f"`{name}` : {hits[name]} replies"
+                                   for name in names)[:2048],
+            colour=discord.Colour.blue(),
+        )
+        limiter = self.bot.reply_limiter
+        embed.add_field(
+            name="Limits",
+            value=(f"{limiter.stats['sent']} sent, {limiter.suppressed} "
+                   f"suppressed\n{limiter.stats['duplicate']} duplicates, "
+                   f"{limiter.stats['user']} by user, "
+                   f"{limiter.stats['channel']} by channel\n"
+                   f"{len(limiter)} entries tracked"),
+        )
+        await ctx.send(embed=embed)
 
     @commands.Cog.listener("on_message")
     async def ckwalip(self, message: discord.Message) -> None:
-        """Send the IP."""
+        """Send the IP, or whatever reply a message triggers."""
         if message.author.bot:
             return
 
-        words = frozenset(message.content.lower().split(" "))
-
-        if any((
-                any(word in words for word in ("ip", "ip?", "l'ip", "l'ip?"))
-                and any(word in words for word in ("ckwa", "kwa", "quoi")),
-                "ckwalip" in message.content.lower(),
-        )):
-            await message.reply(self.bot.ckwalip)
+        trigger = self.triggers.match(message.content)
+        if trigger and not self.bot.reply_limiter.check(
+                message.channel.id, message.author.id, trigger.reply):
+            await message.reply(trigger.reply)
 
 
 def setup(bot: commands.Bot):
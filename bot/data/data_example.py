@@ -34,6 +34,24 @@ def setup(bot):
         "cogs.owner",
         "cogs.utility",
     ]
+    bot.lazy_extensions = {
+        "cogs.admin": {
+            "load": {"help": "Load an extension."},
+            "logout": {"help": "Kill the bot."},
+            "pull": {"help": "Pull the code from the remote repo."},
+            "reload": {"help": "Reload extensions."},
+            "unload": {"help": "Unload extensions."},
+        },
+        # "cogs.example": {
+        #     "command": {
+        #         "help": "What the command does",
+        #         "aliases": ["cmd"],
+        #         "hidden": False,
+        #     },
+        # },
+    }
+    # Extensions whose commands are stubs until first used. Don't make
+    # cogs.games lazy : it resumes the saved games when loaded
     if bot.first_on_ready:
         # Discord configuration
         bot.token = "THE BEAUTIFUL TOKEN OF MY DISCORD BOT"
@@ -44,6 +62,17 @@ def setup(bot):
 
         bot.admins = []
 
+        bot.connect4_workers = 2
+
+        bot.game_sessions = {
+            "max_sessions": 200,
+            "per_user": 3,
+            "per_channel": 10,
+            "idle_timeout": 300,
+        }
+
+        bot.game_store = "games.sqlite3"
+
         # bot.postgre_connection = {
         #     "user": "user",
         #     "password": "alec_mais_en_password",
@@ -63,3 +92,36 @@ def setup(bot):
         bot.http.user_agent = "alec_mais_en_user_agent"
 
         bot.ckwalip = "127.0.0.1:9999"
+
+        bot.triggers = [
+            {
+                "name": "ckwalip",
+                "reply": bot.ckwalip,
+                "words": [
+                    ["ip", "ip?", "l'ip", "l'ip?"],
+                    ["ckwa", "kwa", "quoi"],
+                ],
+            },
+            {
+                "name": "ckwalip",
+                "reply": bot.ckwalip,
+                "contains": ["ckwalip"],
+            },
+        ]
+
+        bot.log_shipping = {
+            "interval": 10,
+            "max_entries": 10,
+            "max_queue": 100,
+            "fallback_path": "errors.log",
+        }
+
+        bot.error_journal_path = "errors.sqlite3"
+
+        bot.reply_limits = {
+            "channel_rate": 5,
+            "channel_burst": 3,
+            "user_rate": 10,
+            "user_burst": 2,
+            "dedup_window": 30,
+        }
@@ -0,0 +1,719 @@
+"""Dice expressions.
+
+Copyright (C) 2021  Faholan
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import abc
+import re
+import threading
+import typing as t
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from itertools import accumulate
+from math import ceil, comb, log, log2, sqrt
+from random import choices, gauss, randint, random
+
+MAX_LENGTH = 200  # Characters in an expression
+MAX_DIGITS = 18  # Digits in a number
+MAX_DICE = 10**9  # Dice in a single pool
+MAX_FACES = 10**9
+SAMPLE_LIMIT = 10000  # Bigger pools are drawn from their distribution
+COUNT_FACES_LIMIT = 10000  # Faces for which bigger pools are still kept
+EXPLODE_LIMIT = 100  # Rerolls of a single exploding die
+DETAIL_LIMIT = 20  # Dice shown for each pool
+MAX_SUPPORT = 20000  # Values a distribution may take
+MAX_WORK = 10**7  # Steps of the slowest parts of the statistics
+NAIVE_LIMIT = 32  # Shorter convolutions aren't worth packing into integers
+PRECISION = 64  # Bits kept in the counts of a distribution
+CACHED_DISTRIBUTIONS = 256  # Distributions kept, by normalized expression
+
+TOKEN = re.compile(r"\s*(\d+|kh|kl|dh|dl|d%|[dk!*x+\-()])")
+
+
+class DiceError(ValueError):
+    """An expression that can't be rolled."""
+
+
+class Roll(t.NamedTuple):
+    """The outcome of an expression."""
+
+    total: int
+    detail: str
+
+
+class Distribution(t.NamedTuple):
+    """The exact distribution of an expression.
+
+    The expression is `offset + i` in `counts[i]` cases out of `total`.
+    Counts are exact while they fit in PRECISION bits. Past that, they are
+    rounded to PRECISION bits, still more than a float holds, instead of
+    growing to thousands of bits and slowing down every convolution.
+    """
+
+    offset: int
+    counts: t.List[int]
+    total: int
+
+    @classmethod
+    def constant(cls, value: int) -> "Distribution":
+        """Get the distribution of a number."""
+        return cls(value, [1], 1)
+
+    @property
+    def minimum(self) -> int:
+        """Get the lowest possible value."""
+        return self.offset
+
+    @property
+    def maximum(self) -> int:
+        """Get the highest possible value."""
+        return self.offset + len(self.counts) - 1
+
+    @property
+    def mean(self) -> float:
+        """Get the expected value."""
+        return self.offset + sum(map(int.__mul__, range(len(self.counts)),
+                                     self.counts)) / self.total
+
+    @property
+    def variance(self) -> float:
+        """Get the variance, computed exactly before the final division."""
+        first = sum(map(int.__mul__, range(len(self.counts)), self.counts))
+        second = sum(index * index * count
+                     for index, count in enumerate(self.counts))
+        return (self.total * second - first * first) / self.total**2
+
+    def percentile(self, percent: int) -> int:
+        """Get the lowest value reached in at least `percent`% of cases."""
+        cumulated = list(accumulate(self.counts))
+        return self.offset + bisect_left(
+            [100 * count for count in cumulated], percent * self.total)
+
+    def histogram(self, rows: int = 20, width: int = 30) -> t.List[str]:
+        """Draw the distribution as text, one bar per range of values.
+
+        The extreme values, reached in less than 0.1% of cases, are left out.
+        """
+        cumulated = list(accumulate(self.counts))
+        first = bisect_left([1000 * count for count in cumulated],
+                            self.total)
+        last = bisect_left([1000 * count for count in cumulated],
+                           999 * self.total)
+        counts = self.counts[first:last + 1]
+        size = -(-len(counts) // rows)
+        buckets = [
+            sum(counts[start:start + size])
+            for start in range(0, len(counts), size)
+        ]
+        highest = max(buckets)
+        lines = []
+        for index, bucket in enumerate(buckets):
+            low = self.offset + first + index * size
+            high = min(low + size - 1, self.offset + last)
+            label = str(low) if low == high else f"{low}-{high}"
+            lines.append((label, "#" * round(width * bucket / highest),
+                          100 * bucket / self.total))
+        label_width = max(len(label) for label, _, _ in lines)
+        return [
+            f"{label:>{label_width}} {bar:<{width}} {percent:5.1f}%"
+            for label, bar, percent in lines
+        ]
+
+    def rounded(self) -> "Distribution":
+        """Round the counts to PRECISION bits."""
+        shift = max(self.counts).bit_length() - PRECISION
+        if shift <= 0:
+            return self
+        half = 1 << (shift - 1)
+        counts = [(count + half) >> shift for count in self.counts]
+        return Distribution(self.offset, counts, sum(counts))
+
+    def __add__(self, other: "Distribution") -> "Distribution":
+        return Distribution(
+            self.offset + other.offset,
+            convolve(self.counts, other.counts),
+            self.total * other.total,
+        ).rounded()
+
+    def __neg__(self) -> "Distribution":
+        return Distribution(-self.maximum, self.counts[::-1], self.total)
+
+    def __sub__(self, other: "Distribution") -> "Distribution":
+        return self + -other
+
+    def __mul__(self, other: "Distribution") -> "Distribution":
+        pairs = len(self.counts) * len(other.counts)
+        if pairs > MAX_WORK:
+            raise DiceError("That product is too big for exact statistics")
+        products: t.DefaultDict[int, int] = defaultdict(int)
+        for index, count in enumerate(self.counts):
+            if count:
+                value = self.offset + index
+                for other_index, other_count in enumerate(other.counts):
+                    product = value * (other.offset + other_index)
+                    products[product] += count * other_count
+        offset = min(products)
+        check_support(max(products) - offset + 1)
+        counts = [0] * (max(products) - offset + 1)
+        for value, count in products.items():
+            counts[value - offset] = count
+        return Distribution(offset, counts, self.total * other.total)
+
+    def __pow__(self, exponent: int) -> "Distribution":
+        """Sum `exponent` independent copies, by squaring."""
+        result = Distribution.constant(0)
+        square = self
+        while exponent:
+            if exponent & 1:
+                result += square
+            exponent >>= 1
+            if exponent:
+                square += square
+        return result
+
+
+def check_support(size: int) -> None:
+    """Refuse distributions that would take too many values."""
+    if size > MAX_SUPPORT:
+        raise DiceError("That expression can take too many values for exact "
+                        f"statistics (the limit is {MAX_SUPPORT:,})")
+
+
+def convolve(first: t.List[int], second: t.List[int]) -> t.List[int]:
+    """Multiply two polynomials, given by their coefficients.
+
+    Long ones are packed into integers spaced widely enough for the
+    coefficients of the product not to overlap : Python then multiplies
+    them much faster than two nested loops would.
+    """
+    check_support(len(first) + len(second) - 1)
+    if min(len(first), len(second)) < NAIVE_LIMIT:
+        if len(first) < len(second):
+            first, second = second, first
+        result = [0] * (len(first) + len(second) - 1)
+        for shift, factor in enumerate(second):
+            if factor:
+                for index, count in enumerate(first, shift):
+                    result[index] += count * factor
+        return result
+
+    bits = (max(first).bit_length() + max(second).bit_length() +
+            min(len(first), len(second)).bit_length())
+    width = (bits + 7) // 8
+    packed = [
+        int.from_bytes(
+            b"".join(count.to_bytes(width, "little") for count in counts),
+            "little") for counts in (first, second)
+    ]
+    product = (packed[0] * packed[1]).to_bytes(
+        width * (len(first) + len(second) - 1), "little")
+    return [
+        int.from_bytes(product[start:start + width], "little")
+        for start in range(0, len(product), width)
+    ]
+
+
+DISTRIBUTIONS: t.OrderedDict[str, Distribution] = OrderedDict()
+# The latest distributions computed, by the normalized expression of the node
+DISTRIBUTIONS_LOCK = threading.Lock()
+# Statistics are computed in executor threads
+
+
+class Node(abc.ABC):
+    """A part of a dice expression.
+
+    Nodes print as the normalized expression they were parsed from.
+    """
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def roll(self) -> Roll:
+        """Roll this part of the expression."""
+
+    @abc.abstractmethod
+    def compute_distribution(self) -> Distribution:
+        """Compute the exact distribution of this part of the expression."""
+
+    def distribution(self) -> Distribution:
+        """Get the exact distribution, computed once per expression.
+
+        The lock isn't held during the computation, so two threads may both
+        compute a new expression. The result is the same either way.
+        """
+        key = str(self)
+        with DISTRIBUTIONS_LOCK:
+            if key in DISTRIBUTIONS:
+                DISTRIBUTIONS.move_to_end(key)
+                return DISTRIBUTIONS[key]
+        result = self.compute_distribution()
+        with DISTRIBUTIONS_LOCK:
+            DISTRIBUTIONS[key] = result
+            if len(DISTRIBUTIONS) > CACHED_DISTRIBUTIONS:
+                DISTRIBUTIONS.popitem(last=False)
+        return result
+
+
+class Constant(Node):
+    """A plain number."""
+
+    __slots__ = ("value", )
+
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+    def roll(self) -> Roll:
+        """Get the number."""
+        return Roll(self.value, str(self.value))
+
+    def compute_distribution(self) -> Distribution:
+        """Always the number."""
+        return Distribution.constant(self.value)
+
+
+class Negate(Node):
+    """The opposite of an expression."""
+
+    __slots__ = ("operand", )
+
+    def __init__(self, operand: Node) -> None:
+        self.operand = operand
+
+    def __str__(self) -> str:
+        return f"-{self.operand}"
+
+    def roll(self) -> Roll:
+        """Roll the expression and negate it."""
+        total, detail = self.operand.roll()
+        return Roll(-total, f"-{detail}")
+
+    def compute_distribution(self) -> Distribution:
+        """Mirror the distribution of the expression."""
+        return -self.operand.distribution()
+
+
+class BinaryOperation(Node):
+    """Two expressions added, subtracted or multiplied."""
+
+    __slots__ = ("operator", "left", "right")
+
+    def __init__(self, operator: str, left: Node, right: Node) -> None:
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def __str__(self) -> str:
+        return f"{self.left}{self.operator}{self.right}"
+
+    def compute_distribution(self) -> Distribution:
+        """Combine the distributions of both sides."""
+        left = self.left.distribution()
+        right = self.right.distribution()
+        if self.operator == "+":
+            return left + right
+        if self.operator == "-":
+            return left - right
+        return left * right
+
+    def roll(self) -> Roll:
+        """Roll both sides and combine them."""
+        left, left_detail = self.left.roll()
+        right, right_detail = self.right.roll()
+        if self.operator == "+":
+            total = left + right
+        elif self.operator == "-":
+            total = left - right
+        else:
+            total = left * right
+        return Roll(total, f"{left_detail} {self.operator} {right_detail}")
+
+
+class Group(Node):
+    """An expression between parentheses."""
+
+    __slots__ = ("operand", )
+
+    def __init__(self, operand: Node) -> None:
+        self.operand = operand
+
+    def __str__(self) -> str:
+        return f"({self.operand})"
+
+    def roll(self) -> Roll:
+        """Roll the expression."""
+        total, detail = self.operand.roll()
+        return Roll(total, f"({detail})")
+
+    def compute_distribution(self) -> Distribution:
+        """Get the distribution of the expression."""
+        return self.operand.distribution()
+
+
+def binomial(trials: int, probability: float) -> int:
+    """Draw the number of successes of many trials."""
+    if trials <= 0 or probability <= 0:
+        return 0
+    if probability >= 1:
+        return trials
+    if probability > 0.5:
+        return trials - binomial(trials, 1 - probability)
+    variance = trials * probability * (1 - probability)
+    if variance > 100:
+        return min(trials,
+                   max(0, round(gauss(trials * probability, sqrt(variance)))))
+    # Few successes : jump from one to the next
+    successes = 0
+    position = 0
+    log_failure = log(1 - probability)
+    while True:
+        position += int(log(1 - random()) / log_failure) + 1
+        if position > trials:
+            return successes
+        successes += 1
+
+
+class Dice(Node):
+    """A pool of dice, such as 4d6kh3 or 2d10!.
+
+    Small pools are rolled die by die. Bigger ones are drawn from their
+    distribution : how many of each face were rolled when some dice are
+    kept, or a normal approximation of their sum otherwise.
+    """
+
+    __slots__ = ("count", "faces", "keep", "highest", "explode")
+
+    def __init__(
+        self,
+        count: int,
+        faces: int,
+        keep: t.Optional[int] = None,
+        highest: bool = True,
+        explode: bool = False,
+    ) -> None:
+        self.count = count
+        self.faces = faces
+        self.keep = count if keep is None else min(keep, count)
+        self.highest = highest
+        self.explode = explode
+
+    def __str__(self) -> str:
+        text = f"{self.count}d{self.faces}"
+        if self.explode:
+            text += "!"
+        if self.keep != self.count:
+            text += f"k{'h' if self.highest else 'l'}{self.keep}"
+        return text
+
+    def roll(self) -> Roll:
+        """Roll the dice."""
+        if self.count <= SAMPLE_LIMIT:
+            return self.sample()
+        if self.keep == self.count:
+            # Sum of many independent dice
+            mean = self.count * (self.faces + 1) / 2
+            deviation = sqrt(self.count * (self.faces**2 - 1) / 12)
+            total = min(self.count * self.faces,
+                        max(self.count, round(gauss(mean, deviation))))
+            return Roll(total, f"{self}: {total:,} (approximated)")
+        return self.sample_counts()
+
+    def sample(self) -> Roll:
+        """Roll every die."""
+        rolls = choices(range(1, self.faces + 1), k=self.count)
+        if self.explode:
+            for index, value in enumerate(rolls):
+                last = value
+                rerolls = 0
+                while last == self.faces and rerolls < EXPLODE_LIMIT:
+                    last = randint(1, self.faces)
+                    value += last
+                    rerolls += 1
+                rolls[index] = value
+
+        if self.keep == self.count:
+            kept = rolls
+        else:
+            kept = sorted(rolls, reverse=self.highest)[:self.keep]
+        total = sum(kept)
+
+        shown = ", ".join(map(str, rolls[:DETAIL_LIMIT]))
+        if len(rolls) > DETAIL_LIMIT:
+            shown += f", … {len(rolls) - DETAIL_LIMIT:,} more"
+        if self.keep != self.count:
+            shown += f" → kept {total:,}"
+        return Roll(total, f"[{shown}]")
+
+    def sample_counts(self) -> Roll:
+        """Draw how many of each face were rolled, and keep some of them."""
+        counts = []
+        left = self.count
+        for face in range(self.faces):
+            drawn = binomial(left, 1 / (self.faces - face))
+            counts.append(drawn)
+            left -= drawn
+
+        total = 0
+        to_keep = self.keep
+        faces = range(self.faces, 0, -1) if self.highest else range(
+            1, self.faces + 1)
+        for face in faces:
+            kept = min(to_keep, counts[face - 1])
+            total += kept * face
+            to_keep -= kept
+            if not to_keep:
+                break
+        return Roll(total, f"{self}: {total:,} (drawn)")
+
+    def die_distribution(self) -> Distribution:
+        """Get the distribution of a single die.
+
+        Exploding dice stop once another reroll would be less than 2**-64
+        likely, rather than after the EXPLODE_LIMIT rerolls of an actual
+        roll : the difference doesn't show.
+        """
+        if not self.explode:
+            check_support(self.faces)
+            return Distribution(1, [1] * self.faces, self.faces)
+
+        rerolls = min(EXPLODE_LIMIT, ceil(64 / log2(self.faces)))
+        check_support((rerolls + 1) * self.faces)
+        counts = []
+        for reroll in range(rerolls):
+            # kF + r for r in 1..F-1,
+            # in F**(rerolls - k) of F**(rerolls + 1) cases
+            counts.extend([self.faces**(rerolls - reroll)] *
+                          (self.faces - 1))
+            counts.append(0)
+        counts.extend([1] * self.faces)
+        return Distribution(1, counts, self.faces**(rerolls + 1))
+
+    def compute_distribution(self) -> Distribution:
+        """Sum the dice, or go through the faces to keep some of them."""
+        if self.keep == self.count:
+            check_support(self.count * (self.faces - 1) + 1)
+            return self.die_distribution()**self.count
+        if self.explode:
+            raise DiceError(
+                "I can't compute the statistics of kept exploding dice")
+        return self.kept_distribution()
+
+    def kept_distribution(self) -> Distribution:
+        """Count the ways to reach each sum of the kept dice.
+
+        Faces are gone through from the best to the worst one : the first
+        dice given a face are the kept ones.
+        """
+        if (self.faces * self.count**2 * (self.keep * self.faces + 1) >
+                MAX_WORK):
+            raise DiceError("Too many dice are kept for exact statistics")
+        # (dice given a face so far, sum of the kept ones) : ways
+        states: t.Dict[t.Tuple[int, int], int] = {(0, 0): 1}
+        faces = range(self.faces, 0, -1) if self.highest else range(
+            1, self.faces + 1)
+        for face in faces:
+            new_states: t.DefaultDict[t.Tuple[int, int],
+                                      int] = defaultdict(int)
+            for (given, kept_sum), ways in states.items():
+                left = self.count - given
+                to_keep = max(0, self.keep - given)
+                for dice in range(left + 1):
+                    new_states[given + dice, kept_sum +
+                               min(dice, to_keep) * face] += ways * comb(
+                                   left, dice)
+            states = new_states
+
+        sums = {
+            kept_sum: ways
+            for (given, kept_sum), ways in states.items()
+            if given == self.count
+        }
+        offset = min(sums)
+        counts = [0] * (max(sums) - offset + 1)
+        for kept_sum, ways in sums.items():
+            counts[kept_sum - offset] = ways
+        return Distribution(offset, counts, self.faces**self.count)
+
+
+class Parser:
+    """Recursive descent parser of dice expressions.
+
+    expression := term (("+" | "-") term)*
+    term := unary (("*" | "x") unary)*
+    unary := "-" unary | atom
+    atom := number | dice | "(" expression ")"
+    dice := [number] ("d" number | "d%") ["!"] [("k" | "kh" | "kl" | "dh" |
+        "dl") number]
+    """
+
+    def __init__(self, tokens: t.Sequence[str]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> t.Optional[str]:
+        """Get the next token without consuming it."""
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def next(self) -> t.Optional[str]:
+        """Consume the next token."""
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def number(self, limit: int, what: str) -> int:
+        """Consume a number."""
+        token = self.next()
+        if token is None or not token.isdigit():
+            raise DiceError(f"I expected a number of {what}")
+        value = int(token)
+        if value > limit:
+            raise DiceError(f"That's too many {what} (the limit is {limit:,})")
+        return value
+
+    def parse(self) -> Node:
+        """Parse the whole expression."""
+        if not self.tokens:
+            raise DiceError("There's nothing to roll")
+        node = self.expression()
+        if self.peek() is not None:
+            raise DiceError(f"I didn't expect `{self.peek()}`")
+        return node
+
+    def expression(self) -> Node:
+        """Parse additions and subtractions."""
+        node = self.term()
+        while self.peek() in {"+", "-"}:
+            node = BinaryOperation(self.next(), node, self.term())
+        return node
+
+    def term(self) -> Node:
+        """Parse multiplications."""
+        node = self.unary()
+        while self.peek() in {"*", "x"}:
+            self.next()
+            node = BinaryOperation("*", node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        """Parse negations."""
+        if self.peek() == "-":
+            self.next()
+            return Negate(self.unary())
+        return self.atom()
+
+    def atom(self) -> Node:
+        """Parse numbers, dice and parentheses."""
+        token = self.peek()
+        if token == "(":
+            self.next()
+            node = self.expression()
+            if self.next() != ")":
+                raise DiceError("A parenthesis isn't closed")
+            return Group(node)
+        if token in {"d", "d%"}:
+            return self.dice(1)
+        if token is not None and token.isdigit():
+            self.next()
+            if len(token) > MAX_DIGITS:
+                raise DiceError(f"`{token}` is too big")
+            if self.peek() in {"d", "d%"}:
+                if int(token) > MAX_DICE:
+                    raise DiceError(
+                        f"That's too many dice (the limit is {MAX_DICE:,})")
+                return self.dice(int(token))
+            return Constant(int(token))
+        raise DiceError(f"I didn't expect `{token or 'the end'}`")
+
+    def dice(self, count: int) -> Dice:
+        """Parse the rest of a pool of dice."""
+        if self.next() == "d%":
+            faces = 100
+        else:
+            faces = self.number(MAX_FACES, "faces")
+        if not faces:
+            raise DiceError("Sorry, 0-face dice don't exist")
+
+        explode = self.peek() == "!"
+        if explode:
+            self.next()
+            if faces == 1:
+                raise DiceError("1-face dice would explode forever")
+            if count > SAMPLE_LIMIT:
+                raise DiceError(
+                    f"I can't explode more than {SAMPLE_LIMIT:,} dice")
+
+        keep = None
+        highest = True
+        modifier = self.peek()
+        if modifier in {"k", "kh", "kl", "dh", "dl"}:
+            self.next()
+            amount = self.number(MAX_DICE, "dice")
+            highest = modifier in {"k", "kh", "dl"}
+            keep = amount if modifier[0] == "k" else max(0, count - amount)
+            if (keep < count and count > SAMPLE_LIMIT
+                    and faces > COUNT_FACES_LIMIT):
+                raise DiceError(
+                    f"I can't keep dice out of more than {SAMPLE_LIMIT:,} "
+                    f"dice with more than {COUNT_FACES_LIMIT:,} faces")
+        return Dice(count, faces, keep, highest, explode)
+
+
+def tokenize(expression: str) -> t.Tuple[str, ...]:
+    """Split an expression in tokens, skipping the whitespace between them."""
+    text = expression.lower().rstrip()
+    tokens: t.List[str] = []
+    position = 0
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise DiceError(
+                f"I don't understand `{text[position:].strip()[:10]}`")
+        token = match.group(1)
+        if token.isdigit() and tokens and tokens[-1].isdigit():
+            raise DiceError(f"`{tokens[-1]} {token}` needs an operator "
+                            "between the numbers")
+        tokens.append(token)
+        position = match.end()
+    return tuple(tokens)
+
+
+@lru_cache(maxsize=256)
+def compile_tokens(tokens: t.Tuple[str, ...]) -> Node:
+    """Parse the tokens of an expression, once."""
+    if sum(map(len, tokens)) > MAX_LENGTH:
+        raise DiceError(
+            f"That expression is too long (the limit is {MAX_LENGTH})")
+    return Parser(tokens).parse()
+
+
+def parse(expression: str) -> Node:
+    """Parse an expression."""
+    return compile_tokens(tokenize(expression))
+
+
+def roll(expression: str) -> Roll:
+    """Parse and roll an expression."""
+    return parse(expression).roll()
+
+
+def stats(expression: str) -> Distribution:
+    """Parse an expression and compute its exact distribution."""
+    return parse(expression).distribution()
@@ -0,0 +1,71 @@
+"""Handle command errors by type.
+
+Copyright (C) 2021  Faholan
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import typing as t
+
+from discord.ext import commands
+
+Handler = t.Callable[[commands.Context, Exception], t.Awaitable[None]]
+
+
+class ErrorHandlers:
+    """The handlers of command errors, registered per exception class.
+
+    An error goes to the handler of the first class of its MRO that has
+    one, so a handler also catches the subclasses without one of their own.
+    That lookup is done once per concrete type, then cached until the
+    handlers change.
+    """
+
+    def __init__(self) -> None:
+        self.handlers: t.Dict[t.Type[BaseException], Handler] = {}
+        self.cache: t.Dict[t.Type[BaseException], t.Optional[Handler]] = {}
+
+    def register(
+        self,
+        handler: Handler,
+        *error_types: t.Type[BaseException],
+    ) -> None:
+        """Handle these errors, and their subclasses, with a handler.
+
+        A newer handler of the same class replaces the older one.
+        """
+        for error_type in error_types:
+            self.handlers[error_type] = handler
+        self.cache.clear()
+
+    def unregister(self, handler: Handler) -> None:
+        """Stop handling any error with a handler."""
+        for error_type, registered in list(self.handlers.items()):
+            if registered == handler:
+                del self.handlers[error_type]
+        self.cache.clear()
+
+    def resolve(
+        self,
+        error_type: t.Type[BaseException],
+    ) -> t.Optional[Handler]:
+        """Get the handler of an exception class, if any."""
+        try:
+            return self.cache[error_type]
+        except KeyError:
+            handler = next((self.handlers[base]
+                            for base in error_type.__mro__
+                            if base in self.handlers), None)
+            self.cache[error_type] = handler
+            return handler
@@ -0,0 +1,109 @@
+"""Time every import, like python -X importtime.
+
+Copyright (C) 2021  Faholan
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sys
+import threading
+import time
+import typing as t
+
+
+class ImportRecord(t.NamedTuple):
+    """The time taken to execute a module, in seconds."""
+
+    name: str
+    self_time: float
+    cumulative: float
+    depth: int
+
+
+class ImportProfiler:
+    """A meta path finder timing the modules found by the other ones.
+
+    It finds nothing by itself : it asks the next finders, and wraps the
+    `exec_module` of the loader they return. The time spent in nested
+    imports is subtracted from the self time of a module, as -X importtime
+    does, separately for each thread.
+    """
+
+    def __init__(self) -> None:
+        self.records: t.List[ImportRecord] = []
+        self.local = threading.local()
+
+    def install(self) -> None:
+        """Start timing the imports."""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: t.Optional[t.Sequence[str]] = None,
+        target: t.Any = None,
+    ) -> t.Any:
+        """Get the spec the other finders give, with a timed loader."""
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, "find_spec", None)
+            if finder is self or find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            if (hasattr(loader, "exec_module") and hasattr(loader, "__dict__")
+                    and not isinstance(loader, type)
+                    and "exec_module" not in vars(loader)):
+                loader.exec_module = self.timed(loader.exec_module)
+            # Built-in and frozen modules are loaded by classes : they are
+            # quick, and left alone
+            return spec
+        return None
+
+    def timed(self, exec_module: t.Callable) -> t.Callable:
+        """Record the time taken by a loader to execute modules."""
+
+        def wrapper(module: t.Any) -> None:
+            if not hasattr(self.local, "nested"):
+                self.local.nested = []
+            nested = self.local.nested
+            nested.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                cumulative = time.perf_counter() - start
+                inner = nested.pop()
+                if nested:
+                    nested[-1] += cumulative
+                self.records.append(
+                    ImportRecord(module.__name__, cumulative - inner,
+                                 cumulative, len(nested)))
+
+        return wrapper
+
+    def slowest(self, count: int) -> t.List[ImportRecord]:
+        """Get the imports which took the longest, nested ones included."""
+        return sorted(self.records, key=lambda record: record.cumulative,
+                      reverse=True)[:count]
+
+    @property
+    def total(self) -> float:
+        """Get the time spent importing, in seconds."""
+        return sum(record.self_time for record in self.records)
+
+
+profiler = ImportProfiler()
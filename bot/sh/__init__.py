@@ -1,4 +1,9 @@
 """Classes for using the shell."""
 
+from .journal import ErrorJournal
+from .limiter import ReplyLimiter
+from .logs import LogShipper
 from .paginator import PaginatorInterface, WrappedPaginator
+from .reactions import ANY_USER, ReactionDispatcher, ReactionListener
+from .scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, EditScheduler
 from .shell import ShellReader
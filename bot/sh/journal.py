@@ -0,0 +1,197 @@
+"""Keep every error in a local, searchable journal."""
+
+import asyncio
+import sqlite3
+import time
+import traceback
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from .logs import fingerprint
+
+BATCH_SIZE = 100  # Records written at once
+
+
+class JournalSummary(t.NamedTuple):
+    """The occurrences of an error in the journal."""
+
+    fingerprint: int
+    kind: str
+    error_type: str
+    count: int
+    first: float
+    last: float
+    message: str
+    context: str
+    traceback: str
+
+
+class ErrorJournal:
+    """Record errors in SQLite, indexed by time and fingerprint.
+
+    Recording only queues the error : formatting its traceback and writing
+    it are done in batches by a background task, in a thread of their own
+    which is the only one to touch the database. Once the records take
+    more than `max_bytes`, the oldest quarter is deleted, and its room
+    reused by the next ones.
+    """
+
+    def __init__(
+        self,
+        path: str = "errors.sqlite3",
+        max_bytes: int = 16 * 1024 * 1024,
+        max_queue: int = 1000,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_queue = max_queue
+        self.connection: t.Optional[sqlite3.Connection] = None
+        self.executor = ThreadPoolExecutor(max_workers=1,
+                                           thread_name_prefix="journal")
+        self.queue: t.Optional[asyncio.Queue] = None
+        self.task: t.Optional[asyncio.Task] = None
+        self.stats = {"recorded": 0, "dropped": 0, "rotated": 0}
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the database, from the journal's thread."""
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path,
+                                              isolation_level=None,
+                                              check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS errors (
+                id INTEGER PRIMARY KEY,
+                time REAL NOT NULL,
+                fingerprint INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                type TEXT NOT NULL,
+                message TEXT NOT NULL,
+                context TEXT NOT NULL,
+                traceback TEXT NOT NULL
+            )""")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS errors_time ON errors (time)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS errors_fingerprint "
+                "ON errors (fingerprint, time)")
+        return self.connection
+
+    def record(self, kind: str, context: str, error: BaseException) -> None:
+        """Queue an error to be written."""
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.max_queue)
+        try:
+            self.queue.put_nowait((time.time(), kind, context, error))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return
+        if not self.task or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        """Write the queued errors, in batches."""
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty() and len(batch) < BATCH_SIZE:
+                batch.append(self.queue.get_nowait())
+            await loop.run_in_executor(self.executor, self.write, batch)
+
+    def write(
+        self,
+        batch: t.List[t.Tuple[float, str, str, BaseException]],
+    ) -> None:
+        """Write errors, then make room if needed.
+
+        If SQLite fails, the batch is dropped and the journal goes on.
+        """
+        rows = [(
+            timestamp,
+            fingerprint(error),
+            kind,
+            type(error).__qualname__,
+            str(error),
+            context,
+            "".join(
+                traceback.format_exception(type(error), error,
+                                           error.__traceback__)),
+        ) for timestamp, kind, context, error in batch]
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute("BEGIN")
+                connection.executemany(
+                    "INSERT INTO errors (time, fingerprint, kind, type, "
+                    "message, context, traceback) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            self.stats["dropped"] += len(rows)
+            traceback.print_exc()
+            return
+        self.stats["recorded"] += len(rows)
+
+        try:
+            pages, free, size = (
+                connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+                for pragma in ("page_count", "freelist_count", "page_size"))
+            if (pages - free) * size > self.max_bytes:
+                connection.execute(
+                    "DELETE FROM errors WHERE id <= (SELECT id FROM errors "
+                    "ORDER BY id LIMIT 1 OFFSET "
+                    "(SELECT COUNT(*) FROM errors) / 4)")
+                self.stats["rotated"] += 1
+        except sqlite3.Error:
+            traceback.print_exc()
+
+    async def query(
+        self,
+        since: float,
+        error_type: t.Optional[str] = None,
+        error_fingerprint: t.Optional[int] = None,
+        limit: int = 10,
+    ) -> t.List[JournalSummary]:
+        """Get the errors since a timestamp, the latest first.
+
+        Each distinct error comes once, with its latest occurrence.
+        """
+        conditions = ["time >= ?"]
+        parameters: t.List[t.Any] = [since]
+        if error_type:
+            conditions.append("type = ?")
+            parameters.append(error_type)
+        if error_fingerprint is not None:
+            conditions.append("fingerprint = ?")
+            parameters.append(error_fingerprint)
+        parameters.append(limit)
+
+        def select() -> t.List[JournalSummary]:
+            # SQLite takes the other columns from the row of MAX(time)
+            return [
+                JournalSummary(*row) for row in self.connect().execute(
+                    "SELECT fingerprint, kind, type, COUNT(*), MIN(time), "
+                    "MAX(time), message, context, traceback FROM errors "
+                    f"WHERE {' AND '.join(conditions)} GROUP BY fingerprint "
+                    "ORDER BY MAX(time) DESC LIMIT ?", parameters)
+            ]
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor, select)
+
+    def close(self) -> None:
+        """Write what's left, and close the database."""
+        if self.task:
+            self.task.cancel()
+        batch = []
+        while self.queue and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+        def finish() -> None:
+            if batch:
+                self.write(batch)
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+
+        self.executor.submit(finish)
+        self.executor.shutdown(wait=True)
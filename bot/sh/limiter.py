@@ -0,0 +1,90 @@
+"""Keep automatic replies from flooding channels."""
+
+import time
+import typing as t
+from collections import Counter
+
+REASON_DUPLICATE = "duplicate"
+REASON_USER = "user"
+REASON_CHANNEL = "channel"
+
+
+class ReplyLimiter:
+    """Rate-limit the replies sent by listeners, per channel and per user.
+
+    Each channel and each user has a token bucket, stored as the single
+    time at which it will be full again (the generic cell rate algorithm).
+    Full buckets are worth nothing and are swept away, so only the channels
+    and users that were answered recently take room. On top of that, the
+    same reply isn't sent twice in a channel within `dedup_window`.
+    """
+
+    def __init__(
+        self,
+        channel_rate: float = 5.0,
+        channel_burst: int = 3,
+        user_rate: float = 10.0,
+        user_burst: int = 2,
+        dedup_window: float = 30.0,
+        sweep_interval: float = 60.0,
+    ) -> None:
+        """Allow a reply every `*_rate` seconds, `*_burst` at once."""
+        self.channel_rate = channel_rate
+        self.channel_tolerance = channel_rate * (channel_burst - 1)
+        self.user_rate = user_rate
+        self.user_tolerance = user_rate * (user_burst - 1)
+        self.dedup_window = dedup_window
+        self.sweep_interval = sweep_interval
+
+        self.channels: t.Dict[int, float] = {}
+        self.users: t.Dict[int, float] = {}
+        self.recent: t.Dict[t.Tuple[int, int], float] = {}
+        # When each bucket is full again, and when each reply may be resent
+        self.next_sweep = time.monotonic() + sweep_interval
+        self.stats: t.Counter[str] = Counter()
+
+    def check(
+        self,
+        channel_id: int,
+        user_id: int,
+        reply: str,
+    ) -> t.Optional[str]:
+        """Record a reply if it may be sent, else tell why it may not."""
+        now = time.monotonic()
+        if now >= self.next_sweep:
+            self.sweep(now)
+
+        key = (channel_id, hash(reply))
+        if self.recent.get(key, 0.0) > now:
+            reason = REASON_DUPLICATE
+        else:
+            user_full = max(self.users.get(user_id, now), now)
+            channel_full = max(self.channels.get(channel_id, now), now)
+            if user_full - now > self.user_tolerance:
+                reason = REASON_USER
+            elif channel_full - now > self.channel_tolerance:
+                reason = REASON_CHANNEL
+            else:
+                self.users[user_id] = user_full + self.user_rate
+                self.channels[channel_id] = channel_full + self.channel_rate
+                self.recent[key] = now + self.dedup_window
+                self.stats["sent"] += 1
+                return None
+        self.stats[reason] += 1
+        return reason
+
+    def sweep(self, now: float) -> None:
+        """Forget the full buckets and the replies that may be resent."""
+        for entries in (self.channels, self.users, self.recent):
+            for key in [key for key, until in entries.items() if until <= now]:
+                del entries[key]
+        self.next_sweep = now + self.sweep_interval
+
+    @property
+    def suppressed(self) -> int:
+        """Get the number of replies that were not sent."""
+        return (self.stats[REASON_DUPLICATE] + self.stats[REASON_USER] +
+                self.stats[REASON_CHANNEL])
+
+    def __len__(self) -> int:
+        return len(self.channels) + len(self.users) + len(self.recent)
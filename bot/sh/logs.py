@@ -0,0 +1,198 @@
+"""Batch the errors sent to the log channel."""
+
+import asyncio
+import collections
+import datetime
+import hashlib
+import io
+import traceback
+import typing as t
+
+import aiohttp
+import discord
+
+DESCRIPTION_LIMIT = 2048
+
+
+def fingerprint(error: BaseException) -> int:
+    """Hash the type of an error and the frames it went through.
+
+    Unlike hash(), the result is the same from one run to the next, and
+    fits in a signed 64-bit SQLite integer.
+    """
+    frames = tuple(
+        (frame.f_code.co_filename, frame.f_code.co_name, line)
+        for frame, line in traceback.walk_tb(error.__traceback__))
+    key = repr((type(error).__module__, type(error).__qualname__, frames))
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(),
+        "little",
+        signed=True,
+    )
+
+
+class LogEntry:  # pylint: disable=too-few-public-methods
+    """An error waiting to be sent, and how often it happened."""
+
+    __slots__ = ("title", "description", "count", "first", "last")
+
+    def __init__(self, title: str, description: str,
+                 now: datetime.datetime) -> None:
+        self.title = title
+        self.description = description
+        self.count = 1
+        self.first = now
+        self.last = now
+
+    def render(self) -> str:
+        """Get the entry as markdown."""
+        if self.count == 1:
+            when = f"at {self.first:%H:%M:%S}"
+        else:
+            when = (f"{self.count} times, from {self.first:%H:%M:%S} "
+                    f"to {self.last:%H:%M:%S}")
+        return f"**{self.title}** ({when})\n{self.description}"
+
+
+class LogShipper:
+    """Send errors to the log channel in batches.
+
+    Errors are fingerprinted by their type and the frames of their
+    traceback : while one waits to be sent, its repeats only add to its
+    count. The waiting errors are sent together every `interval` seconds,
+    or as soon as `max_entries` wait. Past `max_queue` of them, new errors
+    are dropped. Whatever Discord refuses, or can't be sent when it is
+    unreachable, is appended to `fallback_path`.
+    """
+
+    def __init__(
+        self,
+        interval: float = 10.0,
+        max_entries: int = 10,
+        max_queue: int = 100,
+        fallback_path: str = "errors.log",
+    ) -> None:
+        self.interval = interval
+        self.max_entries = max_entries
+        self.max_queue = max_queue
+        self.fallback_path = fallback_path
+
+        self.channel: t.Optional[discord.abc.Messageable] = None
+        self.icon_url: t.Any = discord.Embed.Empty
+        # Set once the bot is ready
+
+        self.pending: t.OrderedDict[int, LogEntry] = collections.OrderedDict()
+        self.full: t.Optional[asyncio.Event] = None
+        self.task: t.Optional[asyncio.Task] = None
+
+        self.stats = {
+            "logged": 0,
+            "merged": 0,
+            "dropped": 0,
+            "messages": 0,
+            "to_disk": 0,
+        }
+
+    def log(
+        self,
+        title: str,
+        error: BaseException,
+        context: str = "",
+    ) -> None:
+        """Queue an error, or count it again if it is already waiting."""
+        self.stats["logged"] += 1
+        key = fingerprint(error)
+        entry = self.pending.get(key)
+        now = datetime.datetime.utcnow()
+        if entry:
+            entry.count += 1
+            entry.last = now
+            self.stats["merged"] += 1
+            return
+        if len(self.pending) >= self.max_queue:
+            self.stats["dropped"] += 1
+            return
+
+        formatted_traceback = "".join(
+            traceback.format_tb(error.__traceback__))
+        self.pending[key] = LogEntry(
+            title,
+            (f"{type(error).__name__} : {error}{context}"
+             f"```\n{formatted_traceback}```"),
+            now,
+        )
+        if self.full is None:
+            self.full = asyncio.Event()
+        if len(self.pending) >= self.max_entries:
+            self.full.set()
+        if not self.task or self.task.done():
+            self.task = asyncio.get_event_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        """Flush the waiting errors until there are none left."""
+        while self.pending:
+            try:
+                await asyncio.wait_for(self.full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.full.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send every waiting error, in a single message."""
+        if not self.pending:
+            return
+        entries = list(self.pending.values())
+        self.pending.clear()
+
+        embed = discord.Embed(colour=0xFF0000)
+        embed.set_footer(text="Alec mais en logger", icon_url=self.icon_url)
+        embed.timestamp = datetime.datetime.utcnow()
+        rendered = [entry.render() for entry in entries]
+        file = None
+        if len(entries) == 1 and len(rendered[0]) <= DESCRIPTION_LIMIT:
+            embed.description = rendered[0]
+        else:
+            embed.title = (f"{sum(entry.count for entry in entries)} errors"
+                           f" ({len(entries)} different ones)")
+            embed.description = "\n".join(
+                f"{entry.count} × {entry.title}"
+                for entry in entries)[:DESCRIPTION_LIMIT]
+            file = "\n\n".join(rendered)
+            # Send errors in files if they are too big
+
+        if self.channel is None:
+            self.write(rendered)
+            return
+        try:
+            if file is None:
+                await self.channel.send(embed=embed)
+            else:
+                await self.channel.send(
+                    embed=embed,
+                    file=discord.File(io.StringIO(file),
+                                      filename="errors.md"),
+                )
+            self.stats["messages"] += 1
+        except (discord.DiscordException, aiohttp.ClientError,
+                asyncio.TimeoutError, OSError):
+            # Discord refused them, or can't be reached
+            self.write(rendered)
+
+    def write(self, rendered: t.List[str]) -> None:
+        """Keep errors on the disk, when Discord can't have them."""
+        try:
+            with open(self.fallback_path, "a", encoding="utf-8") as file:
+                for entry in rendered:
+                    file.write(f"{entry}\n\n")
+            self.stats["to_disk"] += len(rendered)
+        except OSError:
+            traceback.print_exc()
+
+    def close(self) -> None:
+        """Stop sending, keeping the waiting errors on the disk."""
+        if self.task:
+            self.task.cancel()
+        if self.pending:
+            self.write([entry.render() for entry in self.pending.values()])
+            self.pending.clear()
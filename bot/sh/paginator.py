@@ -5,6 +5,9 @@ import asyncio
 import discord
 from discord.ext import commands
 
+from .reactions import ANY_USER, ReactionListener
+from .scheduler import PRIORITY_BULK
+
 
 class WrappedPaginator(commands.Paginator):
     """A paginator that allows automatic wrapping of lines should they not fit.
@@ -72,6 +75,10 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
 
         self._display_page = 0
 
+        self._open_page_source = None
+        self._open_page_length = 0
+        self._open_page = ""
+
         self.bot = bot
 
         self.message = None
@@ -96,6 +103,7 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
         self.sent_page_reactions = False
 
         self.task: asyncio.Task = None
+        self.listener: ReactionListener = None
         self.send_lock: asyncio.Event = asyncio.Event()
 
         self.close_exception: Exception = None
@@ -111,17 +119,43 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
 
         # pylint: disable=protected-access
         paginator_pages = list(self.paginator._pages)
-        if len(self.paginator._current_page) > 1:
-            paginator_pages.append("\n".join(self.paginator._current_page) +
-                                   "\n" + (self.paginator.suffix or ""))
         # pylint: enable=protected-access
+        if self.has_open_page:
+            paginator_pages.append(self.open_page)
 
         return paginator_pages
 
+    @property
+    def has_open_page(self) -> bool:
+        """Whether the paginator's active page holds any line."""
+        return len(self.paginator._current_page) > 1  # pylint: disable=protected-access
+
+    @property
+    def open_page(self) -> str:
+        """Get the active page, only joining it again when it changed."""
+
+        # The paginator only ever appends to its active page, or replaces it
+        # when closing it, so the list and its length identify its content
+        current_page = self.paginator._current_page  # pylint: disable=protected-access
+        if (self._open_page_source is not current_page
+                or self._open_page_length != len(current_page)):
+            self._open_page_source = current_page
+            self._open_page_length = len(current_page)
+            self._open_page = ("\n".join(current_page) + "\n" +
+                               (self.paginator.suffix or ""))
+        return self._open_page
+
+    def get_page(self, index: int) -> str:
+        """Get a single page without building the whole list."""
+        closed_pages = self.paginator._pages  # pylint: disable=protected-access
+        if index < len(closed_pages):
+            return closed_pages[index]
+        return self.open_page
+
     @property
     def page_count(self):
         """Get the page count of the internal paginator."""
-        return len(self.pages)
+        return len(self.paginator._pages) + self.has_open_page  # pylint: disable=protected-access
 
     @property
     def display_page(self):
@@ -154,7 +188,7 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
 
         display_page = self.display_page
         page_num = f"\nPage {display_page + 1}/{self.page_count}"
-        content = self.pages[display_page] + page_num
+        content = self.get_page(display_page) + page_num
         return {"content": content}
 
     async def add_line(self, *args, **kwargs):
@@ -190,6 +224,11 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
         if self.task:
             self.task.cancel()
 
+        self.listener = self.bot.reactions.listen(
+            self.message.id,
+            (self.owner.id if self.owner else ANY_USER, ),
+        )
+
         self.task = self.bot.loop.create_task(self.wait_loop())
 
         # if there is more than one page, and the reactions haven't been sent yet, send navigation emotes
@@ -198,6 +237,17 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
 
         return self
 
+    async def edit_message(self, **kwargs):
+        """
+        Edits the message, through the bot's edit scheduler if it has one.
+        """
+
+        scheduler = getattr(self.bot, "edit_scheduler", None)
+        if scheduler is None:
+            await self.message.edit(**kwargs)
+        else:
+            await scheduler.edit(self.message, priority=PRIORITY_BULK, **kwargs)
+
     async def send_all_reactions(self):
         """
         Sends all reactions for this paginator, if any are missing.
@@ -239,35 +289,12 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
         """
 
         start, back, forward, end, close = self.emojis
-
-        def check(payload: discord.RawReactionActionEvent):
-            """
-            Checks if this reaction is related to the paginator interface.
-            """
-
-            owner_check = not self.owner or payload.user_id == self.owner.id
-
-            emoji = payload.emoji
-            if isinstance(emoji,
-                          discord.PartialEmoji) and emoji.is_unicode_emoji():
-                emoji = emoji.name
-
-            tests = (
-                owner_check,
-                payload.message_id == self.message.id,
-                emoji,
-                emoji in self.emojis,
-                payload.user_id != self.bot.user.id,
-            )
-
-            return all(tests)
+        listener, message = self.listener, self.message
+        # send_to replaces them before cancelling this loop
 
         task_list = [
-            self.bot.loop.create_task(coro) for coro in {
-                self.bot.wait_for("raw_reaction_add", check=check),
-                self.bot.wait_for("raw_reaction_remove", check=check),
-                self.send_lock_delayed(),
-            }
+            self.bot.loop.create_task(listener.get()),
+            self.bot.loop.create_task(self.send_lock_delayed()),
         ]
 
         try:  # pylint: disable=too-many-nested-blocks
@@ -287,13 +314,16 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
                     payload = task.result()
 
                     if isinstance(payload, discord.RawReactionActionEvent):
+                        task_list.append(
+                            self.bot.loop.create_task(listener.get()))
+
                         emoji = payload.emoji
                         if (isinstance(emoji, discord.PartialEmoji)
                                 and emoji.is_unicode_emoji()):
                             emoji = emoji.name
 
                         if emoji == close:
-                            await self.message.delete()
+                            await message.delete()
                             return
 
                         if emoji == start:
@@ -304,17 +334,6 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
                             self._display_page -= 1
                         elif emoji == forward:
                             self._display_page += 1
-
-                        if payload.event_type == "REACTION_ADD":
-                            task_list.append(
-                                self.bot.loop.create_task(
-                                    self.bot.wait_for("raw_reaction_add",
-                                                      check=check)))
-                        elif payload.event_type == "REACTION_REMOVE":
-                            task_list.append(
-                                self.bot.loop.create_task(
-                                    self.bot.wait_for("raw_reaction_remove",
-                                                      check=check)))
                     else:
                         # Send lock was released
                         task_list.append(
@@ -327,7 +346,7 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
 
                 if self.send_kwargs != last_kwargs:
                     try:
-                        await self.message.edit(**self.send_kwargs)
+                        await self.edit_message(**self.send_kwargs)
                     except discord.NotFound:
                         # something terrible has happened
                         return
@@ -341,14 +360,15 @@ class PaginatorInterface:  # pylint: disable=too-many-instance-attributes
                 return
 
             if self.delete_message:
-                return await self.message.delete()
+                return await message.delete()
 
             for emoji in filter(None, self.emojis):
                 try:
-                    await self.message.remove_reaction(emoji, self.bot.user)
+                    await message.remove_reaction(emoji, self.bot.user)
                 except (discord.Forbidden, discord.NotFound):
                     pass
 
         finally:
+            listener.close()
             for task in task_list:
                 task.cancel()
@@ -0,0 +1,105 @@
+"""Route reactions straight to whoever waits for them."""
+
+import asyncio
+import typing as t
+
+import discord
+
+ANY_USER = None
+
+
+class ReactionListener:
+    """The reactions on a message, waiting to be processed.
+
+    Both added and removed reactions are received, tell them apart with
+    `payload.event_type`. Use it as a context manager to stop listening.
+    """
+
+    __slots__ = ("dispatcher", "message_id", "user_ids", "queue")
+
+    def __init__(
+        self,
+        dispatcher: "ReactionDispatcher",
+        message_id: int,
+        user_ids: t.Iterable[t.Optional[int]],
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.message_id = message_id
+        self.user_ids = tuple(user_ids)
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def get(
+        self,
+        timeout: t.Optional[float] = None,
+    ) -> discord.RawReactionActionEvent:
+        """Wait for the next reaction.
+
+        Raises asyncio.TimeoutError if none comes in time, like wait_for.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        """Stop receiving reactions."""
+        self.dispatcher.forget(self)
+
+    def __enter__(self) -> "ReactionListener":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class ReactionDispatcher:
+    """Index the messages waiting for reactions.
+
+    `wait_for` runs the check of every waiter on every reaction. Here,
+    listeners are indexed by message and user, so a reaction only costs a
+    dict lookup or two, however many messages wait for one.
+    """
+
+    def __init__(self) -> None:
+        self.index: t.Dict[t.Tuple[int, t.Optional[int]],
+                           ReactionListener] = {}
+        self.stats = {"routed": 0, "dropped": 0}
+
+    def listen(
+        self,
+        message_id: int,
+        user_ids: t.Iterable[t.Optional[int]] = (ANY_USER, ),
+    ) -> ReactionListener:
+        """Receive the reactions of these users on a message.
+
+        Use ANY_USER to receive every user's reactions. A newer listener of
+        the same message and user replaces the older one.
+        """
+        listener = ReactionListener(self, message_id, user_ids)
+        for user_id in listener.user_ids:
+            self.index[message_id, user_id] = listener
+        return listener
+
+    def forget(self, listener: ReactionListener) -> None:
+        """Stop routing reactions to a listener."""
+        for user_id in listener.user_ids:
+            key = (listener.message_id, user_id)
+            if self.index.get(key) is listener:
+                del self.index[key]
+
+    def dispatch(self, payload: discord.RawReactionActionEvent) -> bool:
+        """Route a reaction to its listener, returning whether it had one."""
+        listener = self.index.get((payload.message_id, payload.user_id))
+        if listener is None:
+            listener = self.index.get((payload.message_id, ANY_USER))
+            if listener is None:
+                self.stats["dropped"] += 1
+                return False
+        listener.queue.put_nowait(payload)
+        self.stats["routed"] += 1
+        return True
+
+    @property
+    def listeners(self) -> int:
+        """Count the listeners, indexed once for each of their users."""
+        return len(set(self.index.values()))
+
+    def __len__(self) -> int:
+        return len(self.index)
@@ -0,0 +1,232 @@
+"""Rate-limit aware message edits."""
+
+import asyncio
+import collections
+import itertools
+import time
+import typing as t
+
+import discord
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+
+def fingerprint(kwargs: dict) -> int:
+    """Hash the kwargs of an edit, to detect edits that change nothing."""
+    return hash(
+        tuple(
+            sorted((key,
+                    repr(value.to_dict()) if isinstance(value, discord.Embed)
+                    else repr(value)) for key, value in kwargs.items())))
+
+
+def chain(source: asyncio.Future, target: asyncio.Future) -> None:
+    """Complete target the same way as source, once it's done."""
+
+    def callback(future: asyncio.Future) -> None:
+        if target.done():
+            return
+        if future.cancelled():
+            target.cancel()
+        elif future.exception():
+            target.set_exception(future.exception())
+        else:
+            target.set_result(None)
+
+    source.add_done_callback(callback)
+
+
+class PendingEdit:  # pylint: disable=too-few-public-methods
+    """The latest edit waiting to be applied to a message."""
+
+    __slots__ = ("message", "kwargs", "priority", "order", "future")
+
+    def __init__(self, message: discord.Message, kwargs: dict, priority: int,
+                 order: int, future: asyncio.Future) -> None:
+        self.message = message
+        self.kwargs = kwargs
+        self.priority = priority
+        self.order = order
+        self.future = future
+
+
+class ChannelState:  # pylint: disable=too-few-public-methods
+    """The edits waiting in a channel and its current cadence."""
+
+    __slots__ = ("pending", "interval", "next_edit", "task")
+
+    def __init__(self, interval: float) -> None:
+        self.pending: t.Dict[int, PendingEdit] = {}
+        self.interval = interval
+        self.next_edit = 0.0
+        self.task: t.Optional[asyncio.Task] = None
+
+
+class EditScheduler:
+    """Coalesce and pace message edits, per channel.
+
+    Only the latest content of each message is kept while it waits, so a
+    message edited ten times in a second is only sent once or twice.
+    Edits are flushed channel by channel, interactive ones first, at a pace
+    that slows down whenever Discord makes us wait and speeds up again
+    when it doesn't.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.25,
+        max_interval: float = 10.0,
+        slow_edit: float = 1.0,
+        max_history: int = 1024,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.slow_edit = slow_edit
+
+        self.channels: t.Dict[int, ChannelState] = {}
+        self.history: t.OrderedDict[int, int] = collections.OrderedDict()
+        self.max_history = max_history
+        self.counter = itertools.count()
+
+        self.stats = {
+            "sent": 0,
+            "skipped": 0,
+            "coalesced": 0,
+            "rate_limited": 0,
+            "failed": 0,
+        }
+
+    def edit(
+        self,
+        message: discord.Message,
+        *,
+        priority: int = PRIORITY_BULK,
+        **kwargs,
+    ) -> asyncio.Future:
+        """Schedule an edit of the message.
+
+        The returned future completes once this content, or newer content,
+        has been applied. It fails with the error raised by the edit, if any.
+        """
+        loop = asyncio.get_event_loop()
+        channel = self.channels.get(message.channel.id)
+        if channel is None:
+            channel = self.channels[message.channel.id] = ChannelState(
+                self.min_interval)
+
+        pending = channel.pending.get(message.id)
+        if pending:
+            pending.kwargs = kwargs
+            pending.priority = min(pending.priority, priority)
+            self.stats["coalesced"] += 1
+            return pending.future
+
+        future = loop.create_future()
+        if self.history.get(message.id) == fingerprint(kwargs):
+            self.stats["skipped"] += 1
+            future.set_result(None)
+            return future
+
+        channel.pending[message.id] = PendingEdit(
+            message,
+            kwargs,
+            priority,
+            next(self.counter),
+            future,
+        )
+        if not channel.task or channel.task.done():
+            channel.task = loop.create_task(
+                self.flush(message.channel.id, channel))
+        return future
+
+    def remember(self, message_id: int, kwargs: dict) -> None:
+        """Record the content a message was last edited with."""
+        self.history[message_id] = fingerprint(kwargs)
+        self.history.move_to_end(message_id)
+        while len(self.history) > self.max_history:
+            self.history.popitem(last=False)
+
+    async def flush(self, channel_id: int, channel: ChannelState) -> None:
+        """Apply the edits of a channel until there are none left.
+
+        The channel is then forgotten, once its pace no longer matters.
+        """
+        while True:
+            delay = channel.next_edit - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not channel.pending:
+                break
+
+            pending = min(
+                channel.pending.values(),
+                key=lambda edit: (edit.priority, edit.order),
+            )
+            del channel.pending[pending.message.id]
+            kwargs = pending.kwargs
+
+            start = time.monotonic()
+            try:
+                await pending.message.edit(**kwargs)
+            except discord.HTTPException as error:
+                if error.status != 429:
+                    self.stats["failed"] += 1
+                    if not pending.future.done():
+                        pending.future.set_exception(error)
+                    continue
+
+                # Rate limited anyway: back off and try again
+                self.stats["rate_limited"] += 1
+                retry_after = float(
+                    error.response.headers.get("Retry-After", channel.interval))
+                channel.interval = min(self.max_interval,
+                                       channel.interval * 2)
+                channel.next_edit = time.monotonic() + max(
+                    retry_after, channel.interval)
+                if pending.message.id in channel.pending:
+                    # Newer content arrived meanwhile, it'll resolve this one
+                    chain(channel.pending[pending.message.id].future,
+                          pending.future)
+                else:
+                    channel.pending[pending.message.id] = pending
+                continue
+            except asyncio.CancelledError:
+                if not pending.future.done():
+                    pending.future.cancel()
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                # Whoever waits for this edit gets the error, the others
+                # still get theirs
+                self.stats["failed"] += 1
+                if not pending.future.done():
+                    pending.future.set_exception(error)
+                continue
+
+            self.stats["sent"] += 1
+            self.remember(pending.message.id, kwargs)
+            if not pending.future.done():
+                pending.future.set_result(None)
+
+            # discord.py silently waits when a bucket is exhausted, so a slow
+            # edit means we are too fast for this channel
+            elapsed = time.monotonic() - start
+            if elapsed > self.slow_edit:
+                channel.interval = min(self.max_interval,
+                                       channel.interval * 2)
+            else:
+                channel.interval = max(self.min_interval,
+                                       channel.interval * 0.75)
+            channel.next_edit = time.monotonic() + channel.interval
+
+        if self.channels.get(channel_id) is channel:
+            del self.channels[channel_id]
+
+    def close(self) -> None:
+        """Cancel every pending edit."""
+        for channel in self.channels.values():
+            if channel.task:
+                channel.task.cancel()
+            for pending in channel.pending.values():
+                pending.future.cancel()
+            channel.pending.clear()
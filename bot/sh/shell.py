@@ -1,6 +1,9 @@
 """Adapted from Jishaku."""
 
 import asyncio
+import codecs
+import collections
+import concurrent.futures
 import os
 import re
 import subprocess
@@ -8,52 +11,155 @@ import time
 
 SHELL = os.getenv("SHELL") or "/bin/bash"
 
+CHUNK_SIZE = 65536
+ANSI_ESCAPE = re.compile(r"\x1b[^m\n]*m")
+
 
 def background_reader(stream, loop: asyncio.AbstractEventLoop, callback):
     """
-    Reads a stream and forwards each line to an async callback.
+    Reads a stream and forwards each chunk to an async callback.
+
+    The thread waits for each callback to complete before reading on, so chunks
+    are delivered in order and the reader stalls whenever the callback does.
+    An empty chunk is forwarded on EOF.
     """
 
-    for line in iter(stream.readline, b""):
-        loop.call_soon_threadsafe(loop.create_task, callback(line))
+    while True:
+        chunk = stream.read1(CHUNK_SIZE)
+        future = asyncio.run_coroutine_threadsafe(callback(chunk), loop)
+        try:
+            future.result()
+        except (concurrent.futures.CancelledError, RuntimeError):
+            return  # The loop is going away
+        if not chunk:
+            return
+
+
+async def stream_reader(stream: asyncio.StreamReader, callback):
+    """
+    Reads an asyncio stream and forwards each chunk to an async callback.
+
+    An empty chunk is forwarded on EOF.
+    """
+
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        await callback(chunk)
+        if not chunk:
+            return
+
+
+class LineDecoder:
+    """Turns chunks of raw output into clean lines.
+
+    Decoding is incremental, so multibyte characters split between two chunks
+    are handled. Cleaning is done once per chunk rather than once per line.
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.pending = ""
+
+    def feed(self, chunk: bytes):
+        """Decode a chunk, returning every line it completes.
+
+        An empty chunk means EOF and flushes the last line.
+        """
+
+        final = not chunk
+        text = self.pending + self.decoder.decode(chunk, final=final)
+        if final:
+            self.pending = ""
+            if not text:
+                return []
+        else:
+            text, newline, self.pending = text.rpartition("\n")
+            if not newline:
+                if len(self.pending) < CHUNK_SIZE:
+                    return []
+                # Don't buffer endless lines, let the paginator wrap them
+                text, self.pending = self.pending, ""
+
+        text = ANSI_ESCAPE.sub("", text.replace("\r", "")).replace(
+            "``", "`\u200b`")
+        if self.prefix:
+            return [self.prefix + line for line in text.split("\n")]
+        return text.split("\n")
 
 
 class ShellReader:
-    """Passively reads from a shell and buffers results for read."""
+    """Passively reads from a shell and buffers results for read.
+
+    The subprocess is driven by the event loop itself whenever it supports
+    subprocesses. Otherwise (e.g. selector event loop on Windows), we fall
+    back to reading the pipes from executor threads.
+    """
 
     def __init__(self,
                  code: str,
                  timeout: int = 120,
                  loop: asyncio.AbstractEventLoop = None):
-        sequence = [SHELL, "-c", code]
+        self.sequence = [SHELL, "-c", code]
         self.ps1 = "$"
         self.highlight = "sh"
 
-        self.process = subprocess.Popen(
-            sequence,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        self.process = None
         self.close_code = None
 
         self.loop = loop or asyncio.get_event_loop()
         self.timeout = timeout
 
-        self.stdout_task = self.make_reader_task(
-            self.process.stdout,
-            self.stdout_handler,
-        )
-        self.stderr_task = self.make_reader_task(
-            self.process.stderr,
-            self.stderr_handler,
-        )
+        self.stdout_decoder = LineDecoder()
+        self.stderr_decoder = LineDecoder("[stderr] ")
 
         self.queue = asyncio.Queue(maxsize=250)
+        self.buffer = collections.deque()
+        self.closing = False
+
+        self.task = self.loop.create_task(self.run())
 
     @property
     def closed(self):
-        """Check if both tasks are done."""
-        return self.stdout_task.done() and self.stderr_task.done()
+        """Check if the process exited and its output was read."""
+        return self.task.done()
+
+    @property
+    def threaded(self):
+        """Check if the process is read from executor threads."""
+        return isinstance(self.process, subprocess.Popen)
+
+    async def run(self):
+        """Spawn the process and read its output until it exits."""
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.sequence,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except NotImplementedError:
+            self.process = subprocess.Popen(
+                self.sequence,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            await asyncio.gather(
+                self.make_reader_task(
+                    self.process.stdout,
+                    self.stdout_handler,
+                ),
+                self.make_reader_task(
+                    self.process.stderr,
+                    self.stderr_handler,
+                ),
+            )
+            await self.loop.run_in_executor(None, self.process.wait)
+        else:
+            await asyncio.gather(
+                stream_reader(self.process.stdout, self.stdout_handler),
+                stream_reader(self.process.stderr, self.stderr_handler),
+            )
+            await self.process.wait()
 
     async def executor_wrapper(self, *args, **kwargs):
         """Call wrapper for stream reader."""
@@ -69,33 +175,87 @@ class ShellReader:
                 callback,
             ), )
 
-    @staticmethod
-    def clean_bytes(line):
-        """Clean a byte sequence of shell directives and decode it."""
-        text = line.decode("utf-8").replace("\r", "").strip("\n")
-        return re.sub(r"\x1b[^m]*m", "", text).replace("``",
-                                                       "`\u200b`").strip("\n")
+    async def deliver(self, lines):
+        """Put lines in the queue, in order."""
+        for line in lines:
+            if self.closing:
+                return
+            await self.queue.put(line)
 
-    async def stdout_handler(self, line):
+    async def stdout_handler(self, chunk):
         """Handle stdout."""
-        await self.queue.put(self.clean_bytes(line))
+        await self.deliver(self.stdout_decoder.feed(chunk))
 
-    async def stderr_handler(self, line):
+    async def stderr_handler(self, chunk):
         """Handle stderr."""
-        await self.queue.put(self.clean_bytes(b"[stderr] " + line))
+        await self.deliver(self.stderr_decoder.feed(chunk))
+
+    def stop_reading(self):
+        """Stop reading and release readers waiting on a full queue."""
+        self.closing = True
+        self.task.cancel()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def kill(self):
+        """Kill the process if it is still running."""
+        try:
+            self.process.kill()
+        except ProcessLookupError:
+            pass  # Already exited
+
+    async def close(self):
+        """Kill the process, stop reading and wait for the exit code."""
+        self.stop_reading()
+        if self.process is None:
+            return
+
+        if self.threaded:
+            self.process.kill()
+            self.close_code = await self.loop.run_in_executor(
+                None, self.process.wait, 0.5)
+            return
+
+        if self.process.returncode is None:
+            self.kill()
+        try:
+            # Discard unread output, otherwise the pipes never close
+            await asyncio.wait_for(self.process.communicate(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+        self.close_code = self.process.returncode
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
-        self.process.kill()
-        self.process.terminate()
-        self.close_code = self.process.wait(timeout=0.5)
+        self.stop_reading()
+        if self.process is None:
+            return
+
+        if self.threaded:
+            self.process.kill()
+            self.process.terminate()
+            self.close_code = self.process.wait(timeout=0.5)
+        else:
+            # We can't wait for the process here, prefer `async with`
+            if self.process.returncode is None:
+                self.kill()
+            self.close_code = self.process.returncode
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
+        if self.buffer:
+            return self.buffer.popleft()
+
         last_output = time.perf_counter()
 
         while not self.closed or not self.queue.empty():
@@ -105,7 +265,12 @@ class ShellReader:
                 if time.perf_counter() - last_output >= self.timeout:
                     raise exception
             else:
-                last_output = time.perf_counter()
+                # Drain whatever else is ready in one go
+                while not self.queue.empty():
+                    self.buffer.append(self.queue.get_nowait())
                 return item
 
+        if not self.task.cancelled():
+            self.task.result()  # Surface errors raised while reading
+
         raise StopAsyncIteration()
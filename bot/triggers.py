@@ -0,0 +1,148 @@
+"""Automatic replies to keywords.
+
+Copyright (C) 2021  Faholan
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU Affero General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Affero General Public License for more details.
+
+You should have received a copy of the GNU Affero General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+import typing as t
+from collections import Counter, defaultdict
+
+
+class Trigger(t.NamedTuple):
+    """A reply, sent when every keyword group of a rule matches."""
+
+    name: str
+    reply: str
+    required: int
+
+
+class TriggerEngine:
+    """Match messages against every rule at once.
+
+    A rule is a dict with a "reply", an optional "name", and keywords :
+    "words" is a list of groups of whole words, and "contains" a group of
+    text found anywhere. A message matches a rule when each of its groups
+    has a keyword in it. The first matching rule wins.
+
+    All the keywords of all the rules are compiled into a few regular
+    expressions, so a message is scanned once however many rules there are.
+    Each group is a bit : a match sets the bits of the groups its keyword
+    belongs to, and only then are the rules checked.
+    """
+
+    def __init__(self, rules: t.Iterable[t.Dict[str, t.Any]]) -> None:
+        self.triggers: t.List[Trigger] = []
+        self.words: t.DefaultDict[str, int] = defaultdict(int)
+        self.substrings: t.DefaultDict[str, int] = defaultdict(int)
+        self.hits: t.Counter[str] = Counter()
+
+        bit = 1
+        for rule in rules:
+            groups = [(self.words, group) for group in rule.get("words", ())]
+            if rule.get("contains"):
+                groups.append((self.substrings, rule["contains"]))
+            required = 0
+            for keywords, group in groups:
+                for keyword in group:
+                    keywords[keyword.lower()] |= bit
+                required |= bit
+                bit <<= 1
+            name = rule.get("name", rule["reply"])
+            if not required:
+                raise ValueError(f"The trigger {name} has no keywords")
+            self.triggers.append(Trigger(name, rule["reply"], required))
+
+        for substring in self.substrings:
+            for other, bits in self.substrings.items():
+                if other != substring and other in substring:
+                    self.substrings[substring] |= bits
+        # Substrings are matched longest first : the ones inside a match are
+        # found through its bits
+
+        self.first_word = self.word = self.substring = None
+        if self.words:
+            words = alternatives(self.words)
+            self.first_word = re.compile(f"({words})(?!\\S)")
+            self.word = re.compile(f"\\s({words})(?!\\S)")
+        if self.substrings:
+            substrings = alternatives(self.substrings)
+            if overlapping(self.substrings):
+                substrings = f"(?=({substrings}))"
+            else:
+                substrings = f"({substrings})"
+            self.substring = re.compile(substrings)
+
+    def match(self, content: str) -> t.Optional[Trigger]:
+        """Get the trigger of a message, if any."""
+        text = content.lower()
+        found = 0
+        if self.word:
+            match = self.first_word.match(text)
+            if match:
+                found |= self.words[match.group(1)]
+            for match in self.word.finditer(text):
+                found |= self.words[match.group(1)]
+        if self.substring:
+            for match in self.substring.finditer(text):
+                found |= self.substrings[match.group(1)]
+
+        if found:
+            for trigger in self.triggers:
+                if found & trigger.required == trigger.required:
+                    self.hits[trigger.name] += 1
+                    return trigger
+        return None
+
+
+def overlapping(keywords: t.Collection[str]) -> bool:
+    """Check whether a keyword may start in the middle of another one.
+
+    If none can, the keywords are matched one after the other, which is
+    faster than looking for one at every character.
+    """
+    return any(
+        first[-size:] == second[:size] for first in keywords
+        for second in keywords if first != second
+        for size in range(1, min(len(first), len(second))))
+
+
+def alternatives(keywords: t.Iterable[str]) -> str:
+    """Get a pattern matching any keyword, the longest one if several do.
+
+    The keywords are factored into a trie, so the regex engine picks its way
+    character by character instead of trying each keyword in turn.
+    """
+    trie: t.Dict[str, t.Any] = {}
+    for keyword in keywords:
+        node = trie
+        for character in keyword:
+            node = node.setdefault(character, {})
+        node[""] = {}
+    return trie_pattern(trie)
+
+
+def trie_pattern(node: t.Dict[str, t.Any]) -> str:
+    """Get the pattern of a trie, greedy so that longer keywords win."""
+    branches = [
+        re.escape(character) + trie_pattern(child)
+        for character, child in node.items() if character
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    pattern = f"(?:{'|'.join(branches)})"
+    return pattern + "?" if "" in node else pattern
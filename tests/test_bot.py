@@ -0,0 +1,28 @@
+"""Tests of the extension loading."""
+
+import sys
+import unittest
+
+from bot.bot import imports_of, preimport
+
+
+class PreimportTest(unittest.TestCase):
+    """Extensions are only run by load_extension."""
+
+    def test_relative_imports_are_resolved(self) -> None:
+        modules = imports_of("bot.cogs.utility")
+        self.assertIn("discord.ext.commands", modules)
+        self.assertIn("bot.dice", modules)
+        self.assertIn("bot.triggers", modules)
+
+    def test_extension_is_not_run(self) -> None:
+        sys.modules.pop("bot.cogs.utility", None)
+        sys.modules.pop("bot.triggers", None)
+        preimport("bot.cogs.utility", {"bot.cogs.utility"})
+        self.assertNotIn("bot.cogs.utility", sys.modules)
+        self.assertIn("bot.triggers", sys.modules)
+
+    def test_other_extensions_are_not_run(self) -> None:
+        sys.modules.pop("bot.triggers", None)
+        preimport("bot.cogs.utility", {"bot.cogs.utility", "bot.triggers"})
+        self.assertNotIn("bot.triggers", sys.modules)
@@ -0,0 +1,51 @@
+"""Tests of the game sessions."""
+
+import asyncio
+import types
+import unittest
+
+from bot.cogs.games import GameMenu, GameSessionManager
+
+
+def context(user_id: int, channel_id: int) -> types.SimpleNamespace:
+    """Get the parts of a context the session manager uses."""
+    return types.SimpleNamespace(
+        author=types.SimpleNamespace(id=user_id),
+        channel=types.SimpleNamespace(id=channel_id),
+    )
+
+
+class SweepTest(unittest.IsolatedAsyncioTestCase):
+    """The sweeper ends the games left alone for too long."""
+
+    async def test_idle_game_is_evicted(self) -> None:
+        manager = GameSessionManager(idle_timeout=0.2)
+        game = GameMenu()
+        self.assertIsNone(manager.open(game, context(1, 1)))
+        self.assertGreater(game.timeout, manager.idle_timeout)
+
+        await asyncio.sleep(0.35)
+        self.assertNotIn(game, manager.sessions)
+        self.assertEqual(manager.evicted, 1)
+        self.assertFalse(game._running)  # pylint: disable=protected-access
+        self.assertFalse(manager.users)
+        self.assertFalse(manager.channels)
+        manager.stop()
+
+    async def test_active_game_is_kept(self) -> None:
+        manager = GameSessionManager(idle_timeout=0.2)
+        idle, active = GameMenu(), GameMenu()
+        manager.open(idle, context(1, 1))
+        manager.open(active, context(2, 1))
+        for _ in range(7):
+            await asyncio.sleep(0.05)
+            manager.touch(active)
+
+        self.assertNotIn(idle, manager.sessions)
+        self.assertIn(active, manager.sessions)
+        self.assertEqual(manager.evicted, 1)
+        manager.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
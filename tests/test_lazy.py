@@ -0,0 +1,68 @@
+"""Tests of the extensions loaded on first use."""
+
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from bot.bot import AlecMaisEnBot
+from bot.data import data_example
+
+
+class LazyExtensionTest(unittest.IsolatedAsyncioTestCase):
+    """The example configuration loads cogs.admin on first use."""
+
+    async def asyncSetUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+        def setup(bot: AlecMaisEnBot, _name: str) -> None:
+            data_example.setup(bot)
+            bot.log_channel_id = 1
+            bot.error_journal_path = os.path.join(self.directory.name,
+                                                  "errors.sqlite3")
+
+        with mock.patch.object(AlecMaisEnBot, "load_extension", setup):
+            self.bot = AlecMaisEnBot()
+        self.bot.add_lazy_commands("cogs.admin")
+
+    async def asyncTearDown(self) -> None:
+        for ext in tuple(self.bot.extensions):
+            self.bot.unload_extension(ext)
+        self.bot.error_journal.close()
+        self.bot.log_shipper.close()
+        self.directory.cleanup()
+
+    async def test_stub_loads_extension(self) -> None:
+        stub = self.bot.get_command("load")
+        self.assertIsNone(stub.cog)
+        self.assertEqual(stub.help, "Load an extension.")
+        self.assertNotIn("bot.cogs.admin", self.bot.extensions)
+
+        message = object()
+        self.bot.get_context = mock.AsyncMock(return_value="context")
+        self.bot.invoke = mock.AsyncMock()
+        await stub.callback(types.SimpleNamespace(message=message))
+
+        self.assertIn("bot.cogs.admin", self.bot.extensions)
+        command = self.bot.get_command("load")
+        self.assertIsNot(command, stub)
+        self.assertEqual(command.cog.qualified_name, "Admin")
+        self.assertNotIn("cogs.admin", self.bot.lazy_commands)
+        self.bot.get_context.assert_awaited_once_with(message)
+        self.bot.invoke.assert_awaited_once_with("context")
+
+    async def test_unload_restores_stubs(self) -> None:
+        self.bot.load_extension("cogs.admin")
+        self.assertIsNotNone(self.bot.get_command("unload").cog)
+
+        self.bot.unload_extension("cogs.admin")
+        self.assertNotIn("bot.cogs.admin", self.bot.extensions)
+        stubs = self.bot.lazy_commands["cogs.admin"]
+        self.assertEqual(
+            sorted(stub.name for stub in stubs),
+            ["load", "logout", "pull", "reload", "unload"],
+        )
+        for stub in stubs:
+            self.assertIs(self.bot.get_command(stub.name), stub)
+            self.assertIsNone(stub.cog)